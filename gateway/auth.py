@@ -0,0 +1,102 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+
+import httpx
+from fastapi import HTTPException, Request
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from cache import LocalLRU
+from upstream import UpstreamPool
+
+
+logger = logging.getLogger(__name__)
+
+# 与 todo_service 的 UserRead 字段一致
+IDENTITY_FIELDS = ("id", "email", "is_active", "is_superuser", "is_verified")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def sign_identity(user: dict, secret: str, ttl: int) -> str:
+    """生成紧凑的身份头：base64url(payload).base64url(HMAC-SHA256)"""
+    payload = {k: user[k] for k in IDENTITY_FIELDS}
+    payload["exp"] = int(time.time()) + ttl
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    signature = hmac.new(secret.encode(), body.encode(), hashlib.sha256).digest()
+    return f"{body}.{_b64encode(signature)}"
+
+
+class IdentityResolver:
+    """在网关统一解析 bearer token，结果缓存在进程内和 Redis（与 todo_service 共用 user:{token}）."""
+
+    def __init__(
+        self,
+        redis: Redis,
+        upstreams: UpstreamPool,
+        service: str,
+        user_path: str,
+        cache_ttl: int,
+        local_max_entries: int,
+        local_ttl: float,
+    ):
+        self.redis = redis
+        self.upstreams = upstreams
+        self.service = service
+        self.user_path = user_path
+        self.cache_ttl = cache_ttl
+        self.local = LocalLRU(local_max_entries, local_ttl)
+
+    async def resolve(self, request: Request) -> dict | None:
+        """返回当前用户；未携带 token 时返回 None，token 无效时抛出 401"""
+        authorization = request.headers.get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+
+        user = self.local.get(token)
+        if user is not None:
+            return user
+
+        try:
+            cached_user = await self.redis.get(f"user:{token}")
+        except RedisError as e:
+            logger.warning("Identity cache lookup failed: %s", e)
+            cached_user = None
+        if cached_user:
+            user = json.loads(cached_user)
+        else:
+            user = await self._fetch_user(authorization)
+            try:
+                await self.redis.setex(f"user:{token}", self.cache_ttl, json.dumps(user))
+            except RedisError as e:
+                logger.warning("Identity cache store failed: %s", e)
+
+        self.local.set(token, user)
+        return user
+
+    async def _fetch_user(self, authorization: str) -> dict:
+        upstream = self.upstreams.get(self.service)
+        replica = upstream.pick()
+        upstream.acquire()  # 热加载时旧客户端等本次请求结束后再关闭
+        try:
+            response = await replica.client.get(
+                self.user_path, headers={"Authorization": authorization}
+            )
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            raise HTTPException(
+                status_code=exc.response.status_code,
+                detail="Invalid authentication credentials",
+            )
+        except httpx.RequestError:
+            raise HTTPException(status_code=503, detail="User service unavailable")
+        finally:
+            upstream.release()
+        return response.json()
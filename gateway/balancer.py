@@ -0,0 +1,83 @@
+import itertools
+import random
+import time
+
+import httpx
+
+
+class Replica:
+    """单个后端实例：持有独立的连接池，并记录负载与健康状态."""
+
+    def __init__(
+        self,
+        url: str,
+        client: httpx.AsyncClient,
+        eject_threshold: int,
+        eject_seconds: float,
+    ):
+        self.url = url
+        self.client = client
+        self.eject_threshold = eject_threshold
+        self.eject_seconds = eject_seconds
+        self.outstanding = 0
+        self.latency = 0.0  # 延迟的指数加权移动平均（秒）
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until <= time.monotonic()
+
+    def acquire(self) -> None:
+        self.outstanding += 1
+
+    def release(self) -> None:
+        self.outstanding -= 1
+
+    def observe(self, latency: float | None, failed: bool) -> None:
+        """被动健康检查：连续失败达到阈值后暂时摘除"""
+        if latency is not None:
+            self.latency = latency if not self.latency else 0.8 * self.latency + 0.2 * latency
+        if not failed:
+            self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.eject_threshold:
+            self.eject()
+
+    def eject(self) -> None:
+        self.ejected_until = time.monotonic() + self.eject_seconds
+
+    def restore(self) -> None:
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+
+class RoundRobin:
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def pick(self, replicas: list[Replica]) -> Replica:
+        return replicas[next(self._counter) % len(replicas)]
+
+
+class LeastOutstanding:
+    def pick(self, replicas: list[Replica]) -> Replica:
+        return min(replicas, key=lambda r: r.outstanding)
+
+
+class PowerOfTwoChoices:
+    """随机取两个实例，选择 (进行中请求数 + 1) * 平均延迟 更小的一个"""
+
+    def pick(self, replicas: list[Replica]) -> Replica:
+        if len(replicas) == 1:
+            return replicas[0]
+        a, b = random.sample(replicas, 2)
+        return min(a, b, key=lambda r: (r.outstanding + 1) * (r.latency or 1e-3))
+
+
+BALANCERS = {
+    "round_robin": RoundRobin,
+    "least_outstanding": LeastOutstanding,
+    "p2c": PowerOfTwoChoices,
+}
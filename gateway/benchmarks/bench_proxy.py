@@ -0,0 +1,107 @@
+"""压测网关转发: 每请求新建 AsyncClient (旧实现) vs 共享连接池 (当前实现).
+
+用法 (在 gateway 目录下):
+    python benchmarks/bench_proxy.py --requests 5000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from config import SERVICES  # noqa: E402
+
+
+STUB_PORT = 18002
+
+stub = FastAPI()
+
+
+@stub.get("/todos")
+async def stub_todos():
+    return [{"id": i, "content": f"todo {i}", "completed": False} for i in range(10)]
+
+
+def start_stub() -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(stub, host="127.0.0.1", port=STUB_PORT, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def legacy_call(base_url: str) -> None:
+    """旧实现: 每个请求创建并关闭一个 AsyncClient"""
+    client = httpx.AsyncClient(base_url=base_url)
+    try:
+        response = await client.get("/todos")
+        response.read()
+    finally:
+        await client.aclose()
+
+
+async def run(label: str, call, total: int, concurrency: int) -> None:
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:<10} {total / elapsed:10.0f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms"
+    )
+
+
+async def bench(total: int, concurrency: int) -> None:
+    base_url = f"http://127.0.0.1:{STUB_PORT}"
+    for service in SERVICES.values():
+        service["base_urls"] = [base_url]
+
+    await run("before", lambda: legacy_call(base_url), total, concurrency)
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://gateway"
+        ) as gateway:
+
+            async def pooled_call():
+                response = await gateway.get("/todos")
+                response.raise_for_status()
+
+            await run("after", pooled_call, total, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    server = start_stub()
+    try:
+        asyncio.run(bench(args.requests, args.concurrency))
+    finally:
+        server.should_exit = True
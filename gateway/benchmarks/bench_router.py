@@ -0,0 +1,62 @@
+"""路由查找微基准: 线性 startswith 扫描 vs 前缀树最长前缀匹配.
+
+用法 (在 gateway 目录下):
+    python benchmarks/bench_router.py --services 20 --routes 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from router import RouteTable  # noqa: E402
+
+
+def build_services(service_count: int, route_count: int) -> dict:
+    services = {
+        f"service_{i}": {"base_url": f"http://127.0.0.1:{9000 + i}", "paths": []}
+        for i in range(service_count)
+    }
+    for i in range(route_count):
+        services[f"service_{i % service_count}"]["paths"].append(
+            f"/api/v{i % 3}/resource_{i}"
+        )
+    return services
+
+
+def linear_match(services: dict, path: str) -> str | None:
+    """旧实现: 依次扫描每个服务的 paths"""
+    for name, service in services.items():
+        if any(path.startswith(p) for p in service["paths"]):
+            return name
+    return None
+
+
+def bench(label: str, func, paths: list[str]) -> None:
+    start = time.perf_counter()
+    for path in paths:
+        func(path)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {elapsed / len(paths) * 1e6:8.2f} us/lookup")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--services", type=int, default=20)
+    parser.add_argument("--routes", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    services = build_services(args.services, args.routes)
+    table = RouteTable(services)
+    rng = random.Random(0)
+    paths = [
+        f"/api/v{i % 3}/resource_{i}/items/{rng.randint(1, 10_000)}"
+        for i in (rng.randrange(args.routes) for _ in range(args.lookups))
+    ]
+
+    bench("linear", lambda p: linear_match(services, p), paths)
+    bench("trie", lambda p: table.match("GET", p), paths)
@@ -0,0 +1,297 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+import httpx
+from fastapi import Request, Response
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+# 缓存条目中不保存的 headers（由网关重新生成）
+_SKIP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "transfer-encoding",
+    "content-encoding",
+    "content-length",
+    "date",
+    "set-cookie",
+}
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: dict[str, str]
+    body: bytes
+    etag: str
+    vary: dict[str, str]  # Vary 中列出的请求头及其取值
+    expires_at: float
+
+    def dumps(self) -> str:
+        data = asdict(self)
+        data["body"] = base64.b64encode(self.body).decode()
+        return json.dumps(data)
+
+    @classmethod
+    def loads(cls, raw: str) -> "CachedResponse":
+        data = json.loads(raw)
+        data["body"] = base64.b64decode(data["body"])
+        return cls(**data)
+
+    def matches(self, request: Request) -> bool:
+        return all(request.headers.get(k, "") == v for k, v in self.vary.items())
+
+
+class LocalLRU:
+    """进程内有界 LRU，条目带过期时间."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+
+    def get(self, key: str):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+class ResponseCache:
+    """GET 响应缓存：进程内 LRU 在前，Redis 在后.
+
+    缓存键包含 method、path、query 和当前用户（由 IdentityResolver 解析）；每个用户有一个代数（generation），
+    用户的数据发生变化时代数加一，旧条目随之失效.
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None,
+        default_ttl: int,
+        local_max_entries: int,
+        local_ttl: float,
+        max_body_size: int,
+    ):
+        self.redis = redis
+        self.default_ttl = default_ttl
+        self.max_body_size = max_body_size
+        self.local = LocalLRU(local_max_entries, local_ttl)
+        self.generations = LocalLRU(local_max_entries, local_ttl)
+        # 跨进程失效消费者的状态：stopped / connecting / consuming / reconnecting / disabled
+        self.invalidations = {
+            "state": "stopped",
+            "received": 0,
+            "failures": 0,
+            "last_error": None,
+        }
+
+    async def _generation(self, user_id: str) -> int:
+        generation = self.generations.get(user_id)
+        if generation is None:
+            generation = int(await self.redis.get(f"gateway:cache:gen:{user_id}") or 0)
+            self.generations.set(user_id, generation)
+        return generation
+
+    async def _key(self, request: Request, user_id: str) -> str:
+        generation = await self._generation(user_id)
+        query = "&".join(sorted(str(request.query_params).split("&")))
+        raw = f"{user_id}:{generation}:{request.method}:{request.url.path}?{query}"
+        return "gateway:cache:" + hashlib.sha1(raw.encode()).hexdigest()
+
+    async def lookup(
+        self, request: Request, user_id: str
+    ) -> tuple[str | None, CachedResponse | None]:
+        """返回 (缓存键, 命中的条目)；键在转发前确定，避免与并发失效产生竞争"""
+        try:
+            key = await self._key(request, user_id)
+        except RedisError as e:
+            logger.warning("Cache lookup failed: %s", e)
+            return None, None
+        directives = parse_cache_control(request.headers.get("cache-control"))
+        if "no-cache" in directives or "no-store" in directives:
+            return key, None
+
+        entry = self.local.get(key)
+        if entry is None:
+            try:
+                raw = await self.redis.get(key)
+            except RedisError as e:
+                logger.warning("Cache lookup failed: %s", e)
+                return key, None
+            if raw is None:
+                return key, None
+            entry = CachedResponse.loads(raw)
+            self.local.set(key, entry, entry.expires_at - time.time())
+        if entry.expires_at < time.time() or not entry.matches(request):
+            return key, None
+        return key, entry
+
+    async def store(self, key: str, request: Request, response: httpx.Response) -> None:
+        ttl = self._ttl(request, response)
+        if ttl <= 0 or len(response.content) > self.max_body_size:
+            return
+        vary_names = [
+            v.strip().lower()
+            for v in response.headers.get("vary", "").split(",")
+            if v.strip()
+        ]
+        if "*" in vary_names:
+            return
+        etag = response.headers.get("etag") or (
+            'W/"%s"' % hashlib.sha1(response.content).hexdigest()
+        )
+        headers = {
+            k: v for k, v in response.headers.items() if k not in _SKIP_HEADERS
+        }
+        headers["etag"] = etag
+        entry = CachedResponse(
+            status_code=response.status_code,
+            headers=headers,
+            body=response.content,
+            etag=etag,
+            vary={name: request.headers.get(name, "") for name in vary_names},
+            expires_at=time.time() + ttl,
+        )
+        self.local.set(key, entry, ttl)
+        try:
+            await self.redis.setex(key, ttl, entry.dumps())
+        except RedisError as e:
+            logger.warning("Cache store failed: %s", e)
+
+    def _ttl(self, request: Request, response: httpx.Response) -> int:
+        if response.status_code != 200:
+            return 0
+        if "no-store" in parse_cache_control(request.headers.get("cache-control")):
+            return 0
+        directives = parse_cache_control(response.headers.get("cache-control"))
+        if "no-store" in directives or "no-cache" in directives:
+            return 0
+        max_age = directives.get("s-maxage") or directives.get("max-age")
+        if max_age is not None and max_age.isdigit():
+            return min(int(max_age), self.default_ttl)
+        return self.default_ttl
+
+    async def invalidate(self, user_id: str) -> None:
+        """用户数据变化：代数加一，该用户的所有缓存条目立即失效"""
+        if self.redis is None:
+            return
+        try:
+            generation = await self.redis.incr(f"gateway:cache:gen:{user_id}")
+            self.generations.set(user_id, generation)
+        except RedisError as e:
+            self.generations.pop(user_id)
+            logger.warning("Cache invalidation failed for %s: %s", user_id, e)
+
+    @staticmethod
+    def respond(request: Request, entry: CachedResponse) -> Response:
+        headers = dict(entry.headers)
+        headers["x-cache"] = "HIT"
+        if request.headers.get("if-none-match") == entry.etag:
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=entry.body, status_code=entry.status_code, headers=headers
+        )
+
+    async def consume_invalidations(
+        self,
+        rabbitmq_url: str,
+        exchange: str,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 30.0,
+    ) -> None:
+        """订阅 todo 事件，收到某用户的事件时使其缓存失效.
+
+        连接失败或消费中断后按指数退避重连，直到任务被取消；状态见 status().
+        """
+        try:
+            from aio_pika import connect_robust
+        except ImportError:
+            logger.warning("aio-pika is not installed, broker invalidation disabled")
+            self.invalidations["state"] = "disabled"
+            return
+
+        delay = retry_delay
+        while True:
+            self.invalidations["state"] = "connecting"
+            try:
+                connection = await connect_robust(rabbitmq_url)
+                try:
+                    await self._consume_invalidations(connection, exchange)
+                finally:
+                    await connection.close()
+                error = "consumer stopped"
+            except asyncio.CancelledError:
+                self.invalidations["state"] = "stopped"
+                raise
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            if self.invalidations["state"] == "consuming":
+                # 曾经消费成功，从最小延迟重新开始退避
+                delay = retry_delay
+            self.invalidations["state"] = "reconnecting"
+            self.invalidations["failures"] += 1
+            self.invalidations["last_error"] = error
+            logger.error(
+                "Cache invalidation consumer failed, retrying in %.1fs: %s", delay, error
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_retry_delay)
+
+    async def _consume_invalidations(self, connection, exchange: str) -> None:
+        from aio_pika import ExchangeType
+
+        channel = await connection.channel()
+        todo_exchange = await channel.declare_exchange(
+            exchange, ExchangeType.TOPIC, durable=True
+        )
+        # 每个网关进程一个独占队列，订阅所有用户的事件（路由键 todo.<user_id>.<action>）
+        queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+        await queue.bind(todo_exchange, routing_key="todo.#")
+        async with queue.iterator(no_ack=True) as messages:
+            self.invalidations["state"] = "consuming"
+            async for message in messages:
+                self.invalidations["received"] += 1
+                # 用户 ID 取自路由键，无需按 content-type 解码消息体
+                prefix, _, rest = (message.routing_key or "").partition(".")
+                user_id = rest.partition(".")[0] if prefix == "todo" else ""
+                if user_id:
+                    await self.invalidate(user_id)
+
+    def status(self) -> dict:
+        return {"local_entries": len(self.local), "invalidations": dict(self.invalidations)}
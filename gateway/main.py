@@ -1,8 +1,84 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 import httpx
 
-app = FastAPI()
+from redis.asyncio import Redis
+
+from auth import IdentityResolver, sign_identity
+from cache import ResponseCache
+from config import SERVICES, settings
+from proxy import build_decoded_headers, build_downstream_headers, send_upstream
+from router import RouteMatch, RouteRegistry
+from upstream import UpstreamPool, UpstreamService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 启动时编译路由表
+    app.state.routes = RouteRegistry(SERVICES, settings.ROUTES_FILE)
+    # 每个后端实例一个长连接客户端，所有请求共享
+    app.state.upstreams = UpstreamPool(app.state.routes.services)
+    await app.state.upstreams.start()
+    tasks = []
+    if settings.HEALTH_CHECK_INTERVAL > 0:
+        tasks.append(
+            asyncio.create_task(
+                app.state.upstreams.health_check(
+                    settings.HEALTH_CHECK_INTERVAL, settings.HEALTH_CHECK_TIMEOUT
+                )
+            )
+        )
+    if settings.ROUTES_FILE:
+        tasks.append(
+            asyncio.create_task(
+                app.state.routes.watch(
+                    settings.ROUTES_RELOAD_INTERVAL, app.state.upstreams.reload
+                )
+            )
+        )
+
+    app.state.redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    app.state.auth = IdentityResolver(
+        app.state.redis,
+        app.state.upstreams,
+        service=settings.AUTH_SERVICE,
+        user_path=settings.AUTH_USER_PATH,
+        cache_ttl=settings.AUTH_CACHE_TTL,
+        local_max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+        local_ttl=settings.CACHE_LOCAL_TTL,
+    )
+
+    # 可选的 GET 响应缓存
+    app.state.cache = None
+    if settings.CACHE_ENABLED:
+        app.state.cache = ResponseCache(
+            app.state.redis,
+            default_ttl=settings.CACHE_TTL,
+            local_max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+            local_ttl=settings.CACHE_LOCAL_TTL,
+            max_body_size=settings.CACHE_MAX_BODY_SIZE,
+        )
+        if settings.RABBITMQ_URL:
+            tasks.append(
+                asyncio.create_task(
+                    app.state.cache.consume_invalidations(
+                        settings.RABBITMQ_URL, settings.CACHE_INVALIDATION_EXCHANGE
+                    )
+                )
+            )
+    yield
+    for task in tasks:
+        task.cancel()
+    await app.state.redis.aclose()
+    await app.state.upstreams.aclose()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 # 配置 CORS（按需调整）
 app.add_middleware(
@@ -13,73 +89,143 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 定义后端服务配置
-SERVICES = {
-    "user_service": {
-        "base_url": "http://127.0.0.1:8001",
-        "paths": ["/auth", "/users", "/server-status"]
-    },
-    "todo_service": {
-        "base_url": "http://127.0.0.1:8002",
-        "paths": ["/lists", "/todos", "/protected-route"]
-    }
-}
-
-async def forward_request(request: Request, service_url: str):
-    client = httpx.AsyncClient(base_url=service_url)
-    url_path = request.url.path
-    headers = dict(request.headers)
-    
-    # 移除可能冲突的 headers
-    headers.pop("host", None)
-    headers.pop("content-length", None)
-
-    # 确保 Content-Type 是 application/json
-    if "content-type" not in headers:
-        headers["content-type"] = "application/json"
 
+async def forward_request(
+    request: Request, service_name: str, path: str, extra_headers: dict | None = None
+) -> Response:
+    upstream = request.app.state.upstreams.get(service_name)
+    service = request.app.state.routes.services[service_name]
+    if service.get("stream", settings.UPSTREAM_STREAMING):
+        return await forward_request_streaming(request, upstream, path, extra_headers)
+
+    response = await send_buffered(request, upstream, path, extra_headers)
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        headers=build_decoded_headers(response),
+    )
+
+
+async def send_buffered(
+    request: Request,
+    upstream: UpstreamService,
+    path: str,
+    extra_headers: dict | None = None,
+) -> httpx.Response:
+    result = await send_upstream(
+        request, upstream, path, streaming=False, extra_headers=extra_headers
+    )
     try:
-        # 获取请求体
-        body = await request.body()
-        
-        # 转发请求
-        response = await client.request(
-            method=request.method,
-            url=url_path,
-            headers=headers,
-            params=request.query_params,
-            content=body
-        )
-        
-        # 提取响应数据
-        return {
-            "status_code": response.status_code,
-            "content": response.content,
-            "headers": dict(response.headers),
-        }
-    except httpx.ConnectError:
-        raise HTTPException(status_code=503, detail="Service unavailable")
+        await result.response.aread()
+    except httpx.TransportError:
+        raise HTTPException(status_code=502, detail="Bad gateway")
     finally:
-        await client.aclose()
+        await result.aclose()
+    return result.response
+
+
+async def forward_request_streaming(
+    request: Request,
+    upstream: UpstreamService,
+    path: str,
+    extra_headers: dict | None = None,
+) -> StreamingResponse:
+    """流式转发：请求体边收边发，响应体边收边回，网关不缓存完整报文"""
+    result = await send_upstream(
+        request, upstream, path, streaming=True, extra_headers=extra_headers
+    )
+
+    async def body():
+        # 客户端中途断开时也要归还连接
+        try:
+            async for chunk in result.response.aiter_raw():
+                yield chunk
+        finally:
+            await result.aclose()
+
+    # 使用 aiter_raw 原样透传（不解压），content-encoding / content-length 保持一致
+    return StreamingResponse(
+        body(),
+        status_code=result.response.status_code,
+        headers=build_downstream_headers(result.response),
+        background=BackgroundTask(result.aclose),
+    )
+
+
+async def forward_request_cached(
+    request: Request,
+    cache: ResponseCache,
+    user_id: str,
+    match: RouteMatch,
+    extra_headers: dict,
+) -> Response:
+    """GET 请求先查缓存，未命中再转发并写入缓存"""
+    key, entry = await cache.lookup(request, user_id)
+    if entry is not None:
+        return cache.respond(request, entry)
+
+    upstream = request.app.state.upstreams.get(match.service)
+    response = await send_buffered(request, upstream, match.path, extra_headers)
+    if key is not None:
+        await cache.store(key, request, response)
+
+    headers = build_decoded_headers(response)
+    headers["x-cache"] = "MISS"
+    return Response(
+        content=response.content, status_code=response.status_code, headers=headers
+    )
+
+
+@app.get("/gateway/status")
+async def gateway_status(request: Request):
+    """各后端的熔断状态、重试预算和实例健康情况"""
+    return request.app.state.upstreams.status()
+
+
+@app.get("/gateway/cache/status")
+async def gateway_cache_status(request: Request):
+    """响应缓存及跨进程失效消费者的状态"""
+    cache = request.app.state.cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.status()}
+
 
 @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
 async def gateway_proxy(request: Request):
-    path = request.url.path
-    
-    # 路由判断逻辑
-    if any(path.startswith(p) for p in SERVICES["user_service"]["paths"]):
-        service = SERVICES["user_service"]
-    elif any(path.startswith(p) for p in SERVICES["todo_service"]["paths"]):
-        service = SERVICES["todo_service"]
-    else:
+    # 路由判断逻辑：最长前缀匹配
+    match = request.app.state.routes.match(request.method, request.url.path)
+    if match is None:
         raise HTTPException(status_code=404, detail="Endpoint not found")
 
-    # 转发请求
-    response_data = await forward_request(request, service["base_url"])
-    
-    # 返回响应
-    return Response(
-        content=response_data["content"],
-        status_code=response_data["status_code"],
-        headers=response_data["headers"],
-    )
\ No newline at end of file
+    cache = request.app.state.cache
+    service = request.app.state.routes.services[match.service]
+    use_identity = bool(settings.IDENTITY_SECRET and service.get("identity"))
+    use_cache = cache is not None and service.get("cache")
+
+    # 在网关解析一次 token，后端只需校验签名身份头
+    user = None
+    if use_identity or use_cache:
+        user = await request.app.state.auth.resolve(request)
+    extra_headers = {}
+    if user is not None and use_identity:
+        extra_headers[settings.IDENTITY_HEADER] = sign_identity(
+            user, settings.IDENTITY_SECRET, settings.IDENTITY_TTL
+        )
+
+    if user is None or not use_cache:
+        # 转发请求
+        return await forward_request(
+            request, match.service, match.path, extra_headers
+        )
+
+    if request.method == "GET":
+        return await forward_request_cached(
+            request, cache, user["id"], match, extra_headers
+        )
+
+    # 写操作成功后立即使该用户的缓存失效（其他网关进程通过 todo 事件失效）
+    response = await forward_request(request, match.service, match.path, extra_headers)
+    if response.status_code < 400:
+        await cache.invalidate(user["id"])
+    return response
@@ -0,0 +1,240 @@
+import asyncio
+import time
+
+import httpx
+from fastapi import HTTPException, Request
+
+from balancer import Replica
+from config import settings
+from upstream import UpstreamService
+
+
+# 逐跳 headers 不应转发
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+# 只有幂等请求允许重试和对冲
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUS = {502, 503, 504}
+
+
+def build_upstream_headers(
+    request: Request, streaming: bool, extra_headers: dict | None = None
+) -> dict:
+    headers = {
+        k: v for k, v in request.headers.items() if k not in HOP_BY_HOP_HEADERS
+    }
+    # 身份头只能由网关签发，丢弃客户端传入的同名 header
+    headers.pop(settings.IDENTITY_HEADER, None)
+    headers.update(extra_headers or {})
+
+    # 移除可能冲突的 headers（流式转发时保留 content-length，避免后端收到 chunked 请求）
+    headers.pop("host", None)
+    if not streaming:
+        headers.pop("content-length", None)
+
+    # 确保 Content-Type 是 application/json
+    if "content-type" not in headers:
+        headers["content-type"] = "application/json"
+    return headers
+
+
+def build_downstream_headers(response: httpx.Response) -> dict:
+    return {
+        k: v for k, v in response.headers.items() if k not in HOP_BY_HOP_HEADERS
+    }
+
+
+def build_decoded_headers(response: httpx.Response) -> dict:
+    """response.content 已解码，去掉与之不符的 content-encoding / content-length"""
+    return {
+        k: v
+        for k, v in build_downstream_headers(response).items()
+        if k not in ("content-encoding", "content-length")
+    }
+
+
+def has_request_body(request: Request) -> bool:
+    return (
+        "content-length" in request.headers or "transfer-encoding" in request.headers
+    )
+
+
+class UpstreamResponse:
+    """后端响应及其占用的实例，关闭时归还实例（可重复调用）.
+
+    send_upstream 返回的响应还持有服务的 in_flight 计数，关闭时一并释放.
+    """
+
+    def __init__(self, response: httpx.Response, replica: Replica):
+        self.response = response
+        self.replica = replica
+        self.upstream: UpstreamService | None = None
+        self._closed = False
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            await self.response.aclose()
+            self.replica.release()
+            if self.upstream is not None:
+                self.upstream.release()
+
+
+async def _attempt(
+    upstream: UpstreamService,
+    replica: Replica,
+    request: Request,
+    path: str,
+    headers: dict,
+    content,
+) -> UpstreamResponse:
+    upstream_request = replica.client.build_request(
+        method=request.method,
+        url=path,
+        headers=headers,
+        params=request.query_params,
+        content=content,
+    )
+    replica.acquire()
+    start = time.perf_counter()
+    try:
+        response = await replica.client.send(upstream_request, stream=True)
+    except asyncio.CancelledError:
+        # 被对冲请求或客户端断开取消，没有结果，归还熔断器的探测名额
+        replica.release()
+        upstream.breaker.release()
+        raise
+    except Exception:
+        # 传输错误，或客户端已被关闭等其他异常，都计为失败
+        replica.release()
+        upstream.record(replica, None, failed=True)
+        raise
+    upstream.record(
+        replica, time.perf_counter() - start, failed=response.status_code >= 500
+    )
+    return UpstreamResponse(response, replica)
+
+
+async def _hedged(upstream: UpstreamService, attempt) -> UpstreamResponse:
+    """超过延迟阈值仍未返回时向另一个实例发出对冲请求，先返回者胜出"""
+    first_replica = upstream.pick()
+    delay = upstream.latencies.threshold()
+    if delay is None:
+        return await attempt(first_replica)
+
+    pending = {asyncio.create_task(attempt(first_replica))}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        # 对冲请求同样经过熔断器放行（半开时占用一个探测名额）
+        if not done and upstream.retry_budget.try_withdraw() and upstream.breaker.allow():
+            second = attempt(upstream.pick(exclude=first_replica))
+            pending.add(asyncio.create_task(second))
+
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winners = [t.result() for t in done if t.exception() is None]
+            if winners:
+                for loser in winners[1:]:
+                    await loser.aclose()
+                return winners[0]
+            error = next(iter(done)).exception()
+        raise error
+    finally:
+        # 胜出者已返回，或等待期间请求被取消：取消仍在进行的尝试
+        for task in pending:
+            task.cancel()
+        for result in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(result, UpstreamResponse):
+                # 取消前已经返回的响应
+                await result.aclose()
+
+
+async def send_upstream(
+    request: Request,
+    upstream: UpstreamService,
+    path: str,
+    streaming: bool,
+    extra_headers: dict | None = None,
+) -> UpstreamResponse:
+    """经熔断器转发请求；幂等且可重放的请求按重试预算重试，并可选对冲."""
+    # 从读取请求体到响应关闭都计入 in_flight，热加载期间不会关闭本请求使用的客户端
+    upstream.acquire()
+    try:
+        result = await _send(request, upstream, path, streaming, extra_headers)
+    except BaseException:
+        upstream.release()
+        raise
+    result.upstream = upstream
+    return result
+
+
+async def _send(
+    request: Request,
+    upstream: UpstreamService,
+    path: str,
+    streaming: bool,
+    extra_headers: dict | None,
+) -> UpstreamResponse:
+    headers = build_upstream_headers(request, streaming, extra_headers)
+    if streaming and has_request_body(request):
+        # 请求体边收边发，无法重放
+        content, replayable = request.stream(), False
+    else:
+        content = None if streaming else await request.body()
+        replayable = request.method in IDEMPOTENT_METHODS
+
+    # 每次放行都要以一次 record 或 release 结束（见 _attempt），放行后立即发出请求
+    if not upstream.breaker.allow():
+        raise HTTPException(status_code=503, detail="Service unavailable")
+
+    async def attempt(replica: Replica) -> UpstreamResponse:
+        return await _attempt(upstream, replica, request, path, headers, content)
+
+    return await _send_with_retries(upstream, attempt, replayable)
+
+
+async def _send_with_retries(
+    upstream: UpstreamService, attempt, replayable: bool
+) -> UpstreamResponse:
+    upstream.retry_budget.deposit()
+    retries = 0
+    while True:
+        try:
+            if replayable and upstream.hedge:
+                result = await _hedged(upstream, attempt)
+            else:
+                result = await attempt(upstream.pick())
+        except httpx.TransportError as e:
+            if (
+                replayable
+                and retries < upstream.max_retries
+                and upstream.retry_budget.try_withdraw()
+                and upstream.breaker.allow()
+            ):
+                retries += 1
+                continue
+            if isinstance(e, httpx.TimeoutException):
+                raise HTTPException(status_code=504, detail="Service timeout")
+            raise HTTPException(status_code=503, detail="Service unavailable")
+
+        if (
+            result.response.status_code in RETRYABLE_STATUS
+            and replayable
+            and retries < upstream.max_retries
+            and upstream.retry_budget.try_withdraw()
+            and upstream.breaker.allow()
+        ):
+            await result.aclose()
+            retries += 1
+            continue
+        return result
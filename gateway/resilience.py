@@ -0,0 +1,107 @@
+import time
+from collections import deque
+from enum import Enum
+
+
+class BreakerState(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后打开，冷却后半开放行少量探测请求."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, half_open_max_calls: int):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = BreakerState.closed
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+
+    def allow(self) -> bool:
+        if self.state is BreakerState.open:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = BreakerState.half_open
+            self.half_open_calls = 0
+        if self.state is BreakerState.half_open:
+            if self.half_open_calls >= self.half_open_max_calls:
+                return False
+            self.half_open_calls += 1
+        return True
+
+    def release(self) -> None:
+        """放行的请求没有得到结果（被取消），归还半开状态的探测名额"""
+        if self.state is BreakerState.half_open and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.state = BreakerState.closed
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state is BreakerState.half_open or self.failures >= self.failure_threshold:
+            self.state = BreakerState.open
+            self.opened_at = time.monotonic()
+
+    def status(self) -> dict:
+        return {"state": self.state.value, "consecutive_failures": self.failures}
+
+
+class RetryBudget:
+    """重试预算：每个请求存入 ratio 个令牌，每次重试/对冲消耗一个.
+
+    另外每秒补充 min_per_second 个令牌，保证低流量时也能重试；余额有上限，
+    后端整体故障时重试量不会超过正常流量的 ratio 倍.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = max(min_per_second, 1.0) * 10
+        self.balance = self.capacity
+        self._updated = time.monotonic()
+
+    def deposit(self) -> None:
+        self.balance = min(self.capacity, self.balance + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        now = time.monotonic()
+        self.balance = min(
+            self.capacity, self.balance + (now - self._updated) * self.min_per_second
+        )
+        self._updated = now
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+class LatencyWindow:
+    """最近 N 个请求的延迟，用于计算对冲请求的触发阈值."""
+
+    def __init__(self, size: int, percentile: float, min_samples: int):
+        self.samples: deque[float] = deque(maxlen=size)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._threshold: float | None = None
+        self._stale = 0
+
+    def add(self, latency: float) -> None:
+        self.samples.append(latency)
+        self._stale += 1
+
+    def threshold(self) -> float | None:
+        if len(self.samples) < self.min_samples:
+            return None
+        # 每积累一批新样本才重新排序，避免每个请求都排序
+        if self._threshold is None or self._stale >= self.min_samples:
+            ordered = sorted(self.samples)
+            index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+            self._threshold = ordered[index]
+            self._stale = 0
+        return self._threshold
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Route:
+    service: str
+    prefix: str
+    methods: frozenset[str] | None = None
+    rewrite: str | None = None
+
+    def allows(self, method: str) -> bool:
+        return self.methods is None or method in self.methods
+
+
+@dataclass(frozen=True)
+class RouteMatch:
+    service: str
+    path: str  # 转发到后端的路径（已应用 rewrite）
+
+
+class _Node:
+    __slots__ = ("children", "routes")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.routes: list[Route] = []
+
+
+def _split(path: str) -> list[str]:
+    return [segment for segment in path.split("/") if segment]
+
+
+def parse_route(service: str, entry: str | dict) -> Route:
+    """解析 SERVICES 中的路径配置.
+
+    支持两种写法:
+        "/todos"
+        {"prefix": "/todos", "methods": ["GET"], "rewrite": "/api/todos"}
+    """
+    if isinstance(entry, str):
+        return Route(service=service, prefix=entry)
+    methods = entry.get("methods")
+    return Route(
+        service=service,
+        prefix=entry["prefix"],
+        methods=frozenset(m.upper() for m in methods) if methods else None,
+        rewrite=entry.get("rewrite"),
+    )
+
+
+class RouteTable:
+    """按路径段编译的前缀树，最长前缀匹配，查找复杂度 O(路径长度)."""
+
+    def __init__(self, services: dict):
+        self.root = _Node()
+        self.size = 0
+        for name, service in services.items():
+            for entry in service.get("paths", []):
+                self.add(parse_route(name, entry))
+
+    def add(self, route: Route) -> None:
+        node = self.root
+        for segment in _split(route.prefix):
+            node = node.children.setdefault(segment, _Node())
+        node.routes.append(route)
+        self.size += 1
+
+    def match(self, method: str, path: str) -> RouteMatch | None:
+        segments = _split(path)
+        node = self.root
+        best: Route | None = None
+        best_depth = 0
+
+        for depth in range(len(segments) + 1):
+            for route in node.routes:
+                if route.allows(method):
+                    best, best_depth = route, depth
+                    break
+            if depth == len(segments):
+                break
+            node = node.children.get(segments[depth])
+            if node is None:
+                break
+
+        if best is None:
+            return None
+        if best.rewrite is None:
+            return RouteMatch(service=best.service, path=path)
+
+        remainder = "/".join(segments[best_depth:])
+        upstream_path = best.rewrite.rstrip("/") + ("/" + remainder if remainder else "")
+        if path.endswith("/") and remainder:
+            upstream_path += "/"
+        return RouteMatch(service=best.service, path=upstream_path or "/")
+
+
+def load_services(config_file: str) -> dict:
+    with open(config_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class RouteRegistry:
+    """持有当前生效的服务配置和路由表，配置文件变化时热加载."""
+
+    def __init__(self, services: dict, config_file: str | None = None):
+        self.config_file = config_file
+        self._mtime: float | None = None
+        if config_file:
+            self._mtime = os.path.getmtime(config_file)
+            services = load_services(config_file)
+        self.services = services
+        self.table = RouteTable(services)
+
+    def match(self, method: str, path: str) -> RouteMatch | None:
+        return self.table.match(method, path)
+
+    async def reload_if_changed(
+        self, on_reload: Callable[[dict], Awaitable[None]] | None = None
+    ) -> bool:
+        """配置文件有修改时重新编译路由表；解析或创建上游失败则保留旧配置"""
+        if not self.config_file:
+            return False
+        try:
+            mtime = os.path.getmtime(self.config_file)
+            if mtime == self._mtime:
+                return False
+            services = load_services(self.config_file)
+            table = RouteTable(services)
+            # 先准备好上游客户端，再整体替换路由表，正在处理的请求不受影响
+            if on_reload is not None:
+                await on_reload(services)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error("Failed to reload routes from %s: %s", self.config_file, e)
+            return False
+
+        self.services, self.table, self._mtime = services, table, mtime
+        logger.info("Reloaded %d routes from %s", table.size, self.config_file)
+        return True
+
+    async def watch(
+        self, interval: float, on_reload: Callable[[dict], Awaitable[None]]
+    ) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload_if_changed(on_reload)
+            except Exception:
+                # 热加载任务不能退出，否则之后的配置修改都不会生效
+                logger.exception("Route reload failed, keeping the current config")
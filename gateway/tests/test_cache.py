@@ -0,0 +1,134 @@
+import asyncio
+from types import SimpleNamespace
+
+import aio_pika
+import pytest
+
+from cache import ResponseCache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values: dict[str, int] = {}
+
+    async def incr(self, key: str) -> int:
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+
+class FakeQueue:
+    def __init__(self, messages: list[str], fail_after: bool):
+        self.messages = messages
+        self.fail_after = fail_after
+
+    async def bind(self, exchange, routing_key: str) -> None:
+        pass
+
+    def iterator(self, no_ack: bool = False):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def __aiter__(self):
+        for routing_key in self.messages:
+            yield SimpleNamespace(routing_key=routing_key)
+        if self.fail_after:
+            raise ConnectionError("channel closed")
+        await asyncio.Future()
+
+
+class FakeConnection:
+    def __init__(self, queue: FakeQueue):
+        self.queue = queue
+        self.closed = False
+
+    async def channel(self):
+        return self
+
+    async def declare_exchange(self, name, type, durable=False):
+        return name
+
+    async def declare_queue(self, exclusive=False, auto_delete=False):
+        return self.queue
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(
+        FakeRedis(), default_ttl=60, local_max_entries=10, local_ttl=5, max_body_size=1024
+    )
+
+
+@pytest.mark.asyncio
+async def test_invalidation_consumer_reconnects_after_failures(cache, monkeypatch):
+    # 第一次连接失败；第二个连接消费一条消息后中断；第三个连接一直消费
+    outcomes = [
+        ConnectionError("connection refused"),
+        FakeConnection(FakeQueue(["todo.alice.created"], fail_after=True)),
+        FakeConnection(FakeQueue(["todo.bob.updated"], fail_after=False)),
+    ]
+    connections = []
+
+    async def connect_robust(url):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        connections.append(outcome)
+        return outcome
+
+    monkeypatch.setattr(aio_pika, "connect_robust", connect_robust)
+    task = asyncio.create_task(
+        cache.consume_invalidations("amqp://broker", "todo_events", retry_delay=0.001)
+    )
+    for _ in range(100):
+        await asyncio.sleep(0.005)
+        if cache.invalidations["received"] == 2:
+            break
+
+    assert cache.status()["invalidations"] == {
+        "state": "consuming",
+        "received": 2,
+        "failures": 2,
+        "last_error": "channel closed",
+    }
+    assert cache.redis.values == {
+        "gateway:cache:gen:alice": 1,
+        "gateway:cache:gen:bob": 1,
+    }
+    assert connections[0].closed
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert cache.invalidations["state"] == "stopped"
+    assert connections[1].closed
+
+
+@pytest.mark.asyncio
+async def test_invalidation_retry_delay_backs_off(cache, monkeypatch):
+    delays = []
+
+    async def connect_robust(url):
+        raise ConnectionError("connection refused")
+
+    async def sleep(delay):
+        delays.append(delay)
+        if len(delays) == 5:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(aio_pika, "connect_robust", connect_robust)
+    monkeypatch.setattr("cache.asyncio.sleep", sleep)
+    with pytest.raises(asyncio.CancelledError):
+        await cache.consume_invalidations(
+            "amqp://broker", "todo_events", retry_delay=1, max_retry_delay=4
+        )
+    assert delays == [1, 2, 4, 4, 4]
+    assert cache.invalidations["state"] == "reconnecting"
+    assert cache.invalidations["failures"] == 5
@@ -0,0 +1,206 @@
+import asyncio
+import gzip
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from proxy import build_decoded_headers, send_upstream
+from resilience import BreakerState, LatencyWindow
+from upstream import UpstreamService
+
+
+class Replica:
+    """模拟一个后端实例：按顺序返回状态码，可设置响应延迟"""
+
+    def __init__(self, statuses=(200,), delay: float = 0):
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        status = self.statuses[min(self.calls, len(self.statuses)) - 1]
+        return httpx.Response(status, text=str(status))
+
+
+def make_upstream(*backends: Replica, **service) -> UpstreamService:
+    urls = [f"http://replica{i}" for i in range(len(backends))]
+    upstream = UpstreamService("todo_service", {"base_urls": urls, **service})
+    for replica, backend in zip(upstream.replicas, backends):
+        replica.client = httpx.AsyncClient(
+            base_url=replica.url, transport=httpx.MockTransport(backend)
+        )
+    return upstream
+
+
+def make_request(method: str = "GET") -> Request:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/todos",
+        "headers": [],
+        "query_string": b"",
+    }
+    return Request(scope, receive)
+
+
+def enable_hedging(upstream: UpstreamService, after: float) -> None:
+    upstream.hedge = True
+    upstream.latencies = LatencyWindow(size=10, percentile=50, min_samples=1)
+    upstream.latencies.add(after)
+
+
+def half_open(upstream: UpstreamService, max_calls: int = 1) -> None:
+    breaker = upstream.breaker
+    breaker.state = BreakerState.open
+    breaker.opened_at = -breaker.reset_timeout
+    breaker.half_open_max_calls = max_calls
+
+
+def outstanding(upstream: UpstreamService) -> list[int]:
+    return [replica.outstanding for replica in upstream.replicas]
+
+
+@pytest.mark.asyncio
+async def test_retries_on_another_replica_within_budget():
+    upstream = make_upstream(Replica([503]), Replica([200]), max_retries=1)
+    result = await send_upstream(make_request(), upstream, "/todos", streaming=False)
+    assert result.response.status_code == 200
+    await result.aclose()
+    assert outstanding(upstream) == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_no_retry_when_budget_is_exhausted():
+    upstream = make_upstream(Replica([503]), Replica([200]), max_retries=1)
+    upstream.retry_budget.balance = 0
+    upstream.retry_budget.min_per_second = 0
+    upstream.retry_budget.ratio = 0
+    result = await send_upstream(make_request(), upstream, "/todos", streaming=False)
+    assert result.response.status_code == 503
+    await result.aclose()
+
+
+@pytest.mark.asyncio
+async def test_no_retry_for_non_idempotent_requests():
+    upstream = make_upstream(Replica([503]), Replica([200]), max_retries=1)
+    result = await send_upstream(
+        make_request("POST"), upstream, "/todos", streaming=False
+    )
+    assert result.response.status_code == 503
+    await result.aclose()
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_and_the_slow_attempt_is_cancelled():
+    slow, fast = Replica(delay=5), Replica()
+    upstream = make_upstream(slow, fast)
+    enable_hedging(upstream, after=0.01)
+
+    result = await send_upstream(make_request(), upstream, "/todos", streaming=False)
+    assert result.replica is upstream.replicas[1]
+    await result.aclose()
+    assert (slow.calls, fast.calls) == (1, 1)
+    assert outstanding(upstream) == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_half_open_probe_releases_its_slot():
+    upstream = make_upstream(Replica(delay=5))
+    half_open(upstream)
+
+    # 客户端在探测请求返回前断开
+    request = asyncio.create_task(
+        send_upstream(make_request(), upstream, "/todos", streaming=False)
+    )
+    await asyncio.sleep(0.01)
+    request.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+
+    assert upstream.breaker.state is BreakerState.half_open
+    assert upstream.breaker.allow()
+    assert outstanding(upstream) == [0]
+
+
+@pytest.mark.asyncio
+async def test_hedge_needs_a_half_open_slot():
+    slow, fast = Replica(delay=0.05), Replica()
+    upstream = make_upstream(slow, fast)
+    enable_hedging(upstream, after=0.01)
+    half_open(upstream, max_calls=1)
+
+    result = await send_upstream(make_request(), upstream, "/todos", streaming=False)
+    assert result.replica is upstream.replicas[0]
+    await result.aclose()
+    assert fast.calls == 0
+    assert upstream.breaker.state is BreakerState.closed
+
+
+@pytest.mark.asyncio
+async def test_losing_hedge_during_half_open_does_not_wedge_the_breaker():
+    slow, fast = Replica(delay=5), Replica()
+    upstream = make_upstream(slow, fast)
+    enable_hedging(upstream, after=0.01)
+    half_open(upstream, max_calls=2)
+
+    result = await send_upstream(make_request(), upstream, "/todos", streaming=False)
+    await result.aclose()
+    assert upstream.breaker.state is BreakerState.closed
+    assert upstream.breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_closed_client_is_recorded_as_a_failure():
+    upstream = make_upstream(Replica())
+    half_open(upstream)
+    await upstream.replicas[0].client.aclose()
+
+    with pytest.raises(RuntimeError):
+        await send_upstream(make_request(), upstream, "/todos", streaming=False)
+    # 探测失败后重新打开，冷却后可以再次探测，而不是一直拒绝
+    assert upstream.breaker.state is BreakerState.open
+    assert outstanding(upstream) == [0]
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_rejects_without_calling_the_upstream():
+    backend = Replica()
+    upstream = make_upstream(backend)
+    upstream.breaker.state = BreakerState.open
+    upstream.breaker.opened_at = float("inf")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await send_upstream(make_request(), upstream, "/todos", streaming=False)
+    assert exc_info.value.status_code == 503
+    assert backend.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_decoded_body_drops_encoding_headers():
+    def gzipped(request: httpx.Request) -> httpx.Response:
+        body = gzip.compress(b'{"ok": true}')
+        return httpx.Response(
+            200,
+            content=body,
+            headers={"content-encoding": "gzip", "content-type": "application/json"},
+        )
+
+    upstream = make_upstream(Replica())
+    upstream.replicas[0].client = httpx.AsyncClient(
+        base_url="http://replica0", transport=httpx.MockTransport(gzipped)
+    )
+    result = await send_upstream(make_request(), upstream, "/todos", streaming=False)
+    await result.response.aread()
+    await result.aclose()
+
+    # 缓冲转发返回的是解码后的内容，不能再带着上游的压缩头和长度
+    headers = build_decoded_headers(result.response)
+    assert result.response.content == b'{"ok": true}'
+    assert headers == {"content-type": "application/json"}
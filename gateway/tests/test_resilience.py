@@ -0,0 +1,83 @@
+import pytest
+
+import resilience
+from resilience import BreakerState, CircuitBreaker, LatencyWindow, RetryBudget
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, half_open_max_calls=1)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state is BreakerState.open
+    assert not breaker.allow()
+
+    clock[0] += 10
+    assert breaker.allow()
+    assert breaker.state is BreakerState.half_open
+    # 半开时只放行 half_open_max_calls 个探测
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state is BreakerState.closed
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, half_open_max_calls=1)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state is BreakerState.open
+    assert not breaker.allow()
+
+
+def test_released_probe_frees_the_half_open_slot(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, half_open_max_calls=1)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_retry_budget_is_funded_by_requests(clock):
+    budget = RetryBudget(ratio=0.5, min_per_second=0)
+    budget.balance = 0
+    assert not budget.try_withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+
+def test_retry_budget_refills_over_time_up_to_capacity(clock):
+    budget = RetryBudget(ratio=0.1, min_per_second=2)
+    budget.balance = 0
+    clock[0] += 1
+    assert budget.try_withdraw()
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    clock[0] += 3600
+    withdrawn = 0
+    while budget.try_withdraw():
+        withdrawn += 1
+    assert withdrawn == budget.capacity == 20
+
+
+def test_latency_window_threshold():
+    window = LatencyWindow(size=100, percentile=90, min_samples=10)
+    for latency in range(9):
+        window.add(latency / 100)
+    assert window.threshold() is None
+    window.add(0.09)
+    assert window.threshold() == 0.09
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from router import RouteRegistry
+from upstream import UpstreamPool
+
+
+GOOD = {"todo_service": {"base_urls": ["http://replica0"], "paths": ["/todos"]}}
+
+
+def write_config(path, services: dict, mtime: float) -> None:
+    path.write_text(json.dumps(services))
+    # mtime 精度因文件系统而异，显式设置保证每次写入都被识别为修改
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.mark.asyncio
+async def test_bad_config_keeps_the_old_routes_until_a_good_one(tmp_path):
+    config = tmp_path / "routes.json"
+    write_config(config, GOOD, 1000)
+    routes = RouteRegistry({}, str(config))
+    pool = UpstreamPool(routes.services)
+    await pool.start()
+    upstream = pool.get("todo_service")
+
+    # 未知的负载均衡策略在创建上游时才报错
+    bad = {
+        "todo_service": GOOD["todo_service"],
+        "list_service": {
+            "base_urls": ["http://lists"],
+            "paths": ["/lists"],
+            "balancer": "typo",
+        },
+    }
+    write_config(config, bad, 1001)
+    assert not await routes.reload_if_changed(pool.reload)
+    assert routes.match("GET", "/lists") is None
+    assert set(pool.services) == {"todo_service"}
+
+    # 缺少 base_url
+    write_config(config, {**GOOD, "list_service": {"paths": ["/lists"]}}, 1002)
+    assert not await routes.reload_if_changed(pool.reload)
+
+    good = {**GOOD, "list_service": {"base_urls": ["http://lists"], "paths": ["/lists"]}}
+    write_config(config, good, 1003)
+    assert await routes.reload_if_changed(pool.reload)
+    assert routes.match("GET", "/lists").service == "list_service"
+    assert pool.get("todo_service") is upstream
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_watch_survives_a_failing_reload(tmp_path):
+    config = tmp_path / "routes.json"
+    write_config(config, GOOD, 1000)
+    routes = RouteRegistry({}, str(config))
+    calls = []
+
+    async def on_reload(services: dict) -> None:
+        calls.append(services)
+        if len(calls) == 1:
+            raise RuntimeError("unexpected")
+
+    watcher = asyncio.create_task(routes.watch(0.001, on_reload))
+    write_config(config, {**GOOD, "x": {"base_urls": ["http://x"], "paths": ["/x"]}}, 1001)
+    for _ in range(100):
+        await asyncio.sleep(0.005)
+        if len(calls) >= 2:
+            break
+
+    assert not watcher.done()
+    assert len(calls) >= 2
+    watcher.cancel()
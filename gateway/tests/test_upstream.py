@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.requests import Request
+
+from config import settings
+from proxy import send_upstream
+from upstream import UpstreamPool
+
+
+SERVICES = {"todo_service": {"base_urls": ["http://replica0"], "paths": ["/todos"]}}
+
+
+def make_request() -> Request:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/todos",
+        "headers": [],
+        "query_string": b"",
+    }
+    return Request(scope, receive)
+
+
+async def start_pool() -> UpstreamPool:
+    pool = UpstreamPool(SERVICES)
+    await pool.start()
+    replica = pool.get("todo_service").replicas[0]
+    await replica.client.aclose()
+    replica.client = httpx.AsyncClient(
+        base_url=replica.url,
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, text="ok")),
+    )
+    return pool
+
+
+def changed(services: dict) -> dict:
+    # 连接参数变化，需要重建客户端
+    return {name: {**service, "timeout": 5.0} for name, service in services.items()}
+
+
+@pytest.mark.asyncio
+async def test_reload_closes_replaced_clients_after_in_flight_requests(monkeypatch):
+    monkeypatch.setattr(settings, "UPSTREAM_DRAIN_TIMEOUT", 10.0)
+    pool = await start_pool()
+    old = pool.get("todo_service")
+    old_client = old.replicas[0].client
+
+    # 流式响应尚未读完时配置被替换
+    result = await send_upstream(make_request(), old, "/todos", streaming=True)
+    await pool.reload(changed(SERVICES))
+    await asyncio.sleep(0.01)
+    assert pool.get("todo_service") is not old
+    assert not old_client.is_closed
+    assert await result.response.aread() == b"ok"
+
+    await result.aclose()
+    await asyncio.sleep(0.01)
+    assert old.in_flight == 0
+    assert old_client.is_closed
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_reload_while_the_request_body_is_uploading(monkeypatch):
+    monkeypatch.setattr(settings, "UPSTREAM_DRAIN_TIMEOUT", 10.0)
+    pool = await start_pool()
+    old = pool.get("todo_service")
+    uploaded = asyncio.Event()
+
+    async def receive():
+        await uploaded.wait()
+        return {"type": "http.request", "body": b'{"content": "a"}', "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "PUT",
+        "path": "/todos/1",
+        "headers": [(b"content-type", b"application/json")],
+        "query_string": b"",
+    }
+    request = asyncio.create_task(
+        send_upstream(Request(scope, receive), old, "/todos/1", streaming=False)
+    )
+    await asyncio.sleep(0.01)
+    await pool.reload(changed(SERVICES))
+    await asyncio.sleep(0.01)
+    assert not old.replicas[0].client.is_closed
+
+    uploaded.set()
+    result = await request
+    assert result.response.status_code == 200
+    await result.aclose()
+    await asyncio.sleep(0.01)
+    assert old.replicas[0].client.is_closed
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_reload_closes_idle_clients_right_away():
+    pool = await start_pool()
+    old_client = pool.get("todo_service").replicas[0].client
+    await pool.reload(changed(SERVICES))
+    await asyncio.sleep(0.01)
+    assert old_client.is_closed
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stuck_requests_do_not_keep_clients_open(monkeypatch):
+    monkeypatch.setattr(settings, "UPSTREAM_DRAIN_TIMEOUT", 0.05)
+    pool = await start_pool()
+    old = pool.get("todo_service")
+    result = await send_upstream(make_request(), old, "/todos", streaming=True)
+    await pool.reload(changed(SERVICES))
+
+    await asyncio.sleep(0.1)
+    assert old.replicas[0].client.is_closed
+    await result.aclose()
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_does_not_wait_for_draining_clients(monkeypatch):
+    monkeypatch.setattr(settings, "UPSTREAM_DRAIN_TIMEOUT", 10.0)
+    pool = await start_pool()
+    old = pool.get("todo_service")
+    result = await send_upstream(make_request(), old, "/todos", streaming=True)
+    await pool.reload(changed(SERVICES))
+    await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(pool.aclose(), 1)
+    assert old.replicas[0].client.is_closed
+    await result.aclose()
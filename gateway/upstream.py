@@ -0,0 +1,261 @@
+import asyncio
+import importlib.util
+import logging
+
+import httpx
+
+from balancer import BALANCERS, Replica
+from config import settings
+from resilience import CircuitBreaker, LatencyWindow, RetryBudget
+
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    """HTTP/2 依赖 h2 包（httpx[http2]），未安装时回退到 HTTP/1.1"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def build_client(base_url: str, options: dict | None = None) -> httpx.AsyncClient:
+    """为单个后端服务创建长连接的 AsyncClient.
+
+    Args:
+        base_url: 后端服务地址.
+        options: 服务级覆盖参数，可包含 timeout、connect_timeout、http2、
+            max_connections、max_keepalive_connections、keepalive_expiry.
+
+    Returns:
+        httpx.AsyncClient: 带连接池和 keep-alive 的客户端.
+    """
+    options = options or {}
+    limits = httpx.Limits(
+        max_connections=options.get(
+            "max_connections", settings.UPSTREAM_MAX_CONNECTIONS
+        ),
+        max_keepalive_connections=options.get(
+            "max_keepalive_connections", settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        keepalive_expiry=options.get(
+            "keepalive_expiry", settings.UPSTREAM_KEEPALIVE_EXPIRY
+        ),
+    )
+    timeout = httpx.Timeout(
+        options.get("timeout", settings.UPSTREAM_TIMEOUT),
+        connect=options.get("connect_timeout", settings.UPSTREAM_CONNECT_TIMEOUT),
+    )
+    http2 = options.get("http2", settings.UPSTREAM_HTTP2)
+    if http2 and not _http2_available():
+        logger.warning("h2 is not installed, falling back to HTTP/1.1 for %s", base_url)
+        http2 = False
+    return httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=timeout, http2=http2
+    )
+
+
+def _client_options(service: dict | None) -> dict:
+    # 路由规则变化不需要重建客户端
+    return {k: v for k, v in (service or {}).items() if k != "paths"}
+
+
+def replica_urls(service: dict) -> list[str]:
+    """base_urls 为多个实例地址；兼容只配置单个 base_url 的写法"""
+    return service.get("base_urls") or [service["base_url"]]
+
+
+class UpstreamService:
+    """一个后端服务的全部实例及负载均衡策略."""
+
+    def __init__(self, name: str, service: dict):
+        self.name = name
+        self.options = _client_options(service)
+        self.health_path = service.get("health_path", "/health")
+        policy = service.get("balancer", settings.LB_POLICY)
+        if policy not in BALANCERS:
+            raise ValueError(f"Unknown balancer {policy!r} for service {name}")
+        self.balancer = BALANCERS[policy]()
+        self.replicas = [
+            Replica(
+                url,
+                build_client(url, service),
+                eject_threshold=service.get(
+                    "eject_threshold", settings.LB_EJECT_THRESHOLD
+                ),
+                eject_seconds=service.get("eject_seconds", settings.LB_EJECT_SECONDS),
+            )
+            for url in replica_urls(service)
+        ]
+        self.breaker = CircuitBreaker(
+            failure_threshold=service.get(
+                "breaker_failure_threshold", settings.BREAKER_FAILURE_THRESHOLD
+            ),
+            reset_timeout=service.get(
+                "breaker_reset_timeout", settings.BREAKER_RESET_TIMEOUT
+            ),
+            half_open_max_calls=settings.BREAKER_HALF_OPEN_MAX_CALLS,
+        )
+        self.retry_budget = RetryBudget(
+            ratio=settings.RETRY_BUDGET_RATIO,
+            min_per_second=settings.RETRY_BUDGET_MIN_PER_SECOND,
+        )
+        self.max_retries = service.get("max_retries", settings.RETRY_MAX_ATTEMPTS)
+        self.hedge = service.get("hedge", settings.HEDGE_ENABLED)
+        self.latencies = LatencyWindow(
+            size=settings.HEDGE_WINDOW_SIZE,
+            percentile=settings.HEDGE_PERCENTILE,
+            min_samples=settings.HEDGE_MIN_SAMPLES,
+        )
+        # 正在使用本服务客户端的请求数（流式响应直到响应体关闭），热加载据此延迟关闭
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def acquire(self) -> None:
+        self.in_flight += 1
+        self._idle.clear()
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+
+    def pick(self, exclude: Replica | None = None) -> Replica:
+        healthy = [r for r in self.replicas if r.healthy and r is not exclude]
+        # 全部实例都被摘除时仍然尝试转发，而不是直接拒绝
+        return self.balancer.pick(healthy or self.replicas)
+
+    def record(self, replica: Replica, latency: float | None, failed: bool) -> None:
+        replica.observe(latency, failed)
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+            self.latencies.add(latency)
+
+    def status(self) -> dict:
+        threshold = self.latencies.threshold()
+        return {
+            "breaker": self.breaker.status(),
+            "retry_budget": round(self.retry_budget.balance, 2),
+            "hedge_after_ms": round(threshold * 1000, 2) if threshold else None,
+            "replicas": [
+                {
+                    "url": r.url,
+                    "healthy": r.healthy,
+                    "outstanding": r.outstanding,
+                    "latency_ms": round(r.latency * 1000, 2),
+                }
+                for r in self.replicas
+            ],
+        }
+
+    async def probe(self, timeout: float) -> None:
+        """主动健康检查：请求每个实例的 health_path"""
+
+        async def check(replica: Replica) -> None:
+            try:
+                response = await replica.client.get(self.health_path, timeout=timeout)
+                ok = response.status_code < 500
+            except httpx.HTTPError:
+                ok = False
+            if ok and not replica.healthy:
+                logger.info("Upstream %s %s is healthy again", self.name, replica.url)
+                replica.restore()
+            elif not ok and replica.healthy:
+                logger.warning("Upstream %s %s failed health check", self.name, replica.url)
+                replica.eject()
+
+        self.acquire()
+        try:
+            await asyncio.gather(*(check(r) for r in self.replicas))
+        finally:
+            self.release()
+
+    async def aclose(self, grace: float = 0) -> None:
+        """关闭各实例的客户端；grace > 0 时先等待进行中的请求结束，最多等待 grace 秒"""
+        try:
+            if grace > 0 and self.in_flight:
+                await asyncio.wait_for(self._idle.wait(), grace)
+        except TimeoutError:
+            logger.warning(
+                "Closing upstream %s with %d requests still in flight",
+                self.name,
+                self.in_flight,
+            )
+        finally:
+            for replica in self.replicas:
+                await replica.client.aclose()
+
+
+class UpstreamPool:
+    """按服务名管理上游实例和连接池，在 lifespan 中创建并共享."""
+
+    def __init__(self, services: dict):
+        self.services: dict[str, UpstreamService] = {}
+        self._config = services
+        self._draining: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        for name, service in self._config.items():
+            self.services[name] = UpstreamService(name, service)
+            logger.info(
+                "Upstream %s created with %d replicas",
+                name,
+                len(self.services[name].replicas),
+            )
+
+    async def reload(self, services: dict) -> None:
+        """配置热加载：为新增或连接参数变化的服务重建实例，关闭已移除的服务.
+
+        已经取到旧实例的请求可能仍在使用旧客户端，旧客户端在这些请求结束后
+        （最多 UPSTREAM_DRAIN_TIMEOUT 秒）于后台关闭.
+        """
+        stale, created = [], []
+        upstreams = dict(self.services)
+        try:
+            # 先创建全部新实例（配置错误时抛出 ValueError / KeyError），成功后才整体替换
+            for name, service in services.items():
+                current = upstreams.get(name)
+                if current is not None and current.options == _client_options(service):
+                    continue
+                created.append(UpstreamService(name, service))
+        except Exception:
+            for upstream in created:
+                await upstream.aclose()
+            raise
+        for upstream in created:
+            if upstream.name in upstreams:
+                stale.append(upstreams[upstream.name])
+            upstreams[upstream.name] = upstream
+        for name in set(upstreams) - set(services):
+            stale.append(upstreams.pop(name))
+
+        self._config, self.services = services, upstreams
+        for upstream in stale:
+            task = asyncio.create_task(
+                upstream.aclose(grace=settings.UPSTREAM_DRAIN_TIMEOUT)
+            )
+            self._draining.add(task)
+            task.add_done_callback(self._draining.discard)
+
+    def get(self, name: str) -> UpstreamService:
+        return self.services[name]
+
+    def status(self) -> dict:
+        return {name: upstream.status() for name, upstream in self.services.items()}
+
+    async def health_check(self, interval: float, timeout: float) -> None:
+        while True:
+            await asyncio.gather(
+                *(upstream.probe(timeout) for upstream in self.services.values())
+            )
+            await asyncio.sleep(interval)
+
+    async def aclose(self) -> None:
+        # 关闭时不再等待旧客户端上的请求，取消后立即关闭
+        for task in list(self._draining):
+            task.cancel()
+        await asyncio.gather(*self._draining, return_exceptions=True)
+        for upstream in self.services.values():
+            await upstream.aclose()
+        self.services.clear()
@@ -57,3 +57,5 @@ def downgrade() -> None:
     op.drop_index(op.f('ix_lists_user_id'), table_name='lists')
     op.drop_table('lists')
     # ### end Alembic commands ###
+    # PostgreSQL 的枚举类型不会随表删除
+    sa.Enum(name='priority').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,68 @@
+"""Add FTS5 index on todos.content
+
+Revision ID: b7d2e9f4c1a3
+Revises: 40f729757448
+Create Date: 2026-10-18 10:12:31.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e9f4c1a3'
+down_revision: Union[str, None] = '40f729757448'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _fts5_supported() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    return bool(
+        bind.execute(sa.text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar()
+    )
+
+
+def upgrade() -> None:
+    # 未编译 FTS5 时跳过，搜索会回退到 ILIKE
+    if not _fts5_supported():
+        return
+    # 外部内容表：只存索引，正文仍在 todos；prefix 索引加速前缀查询
+    op.execute(
+        "CREATE VIRTUAL TABLE todos_fts USING fts5("
+        "content, content='todos', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER todos_fts_ai AFTER INSERT ON todos BEGIN "
+        "INSERT INTO todos_fts(rowid, content) VALUES (new.id, new.content); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER todos_fts_ad AFTER DELETE ON todos BEGIN "
+        "INSERT INTO todos_fts(todos_fts, rowid, content) "
+        "VALUES ('delete', old.id, old.content); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER todos_fts_au AFTER UPDATE OF content ON todos BEGIN "
+        "INSERT INTO todos_fts(todos_fts, rowid, content) "
+        "VALUES ('delete', old.id, old.content); "
+        "INSERT INTO todos_fts(rowid, content) VALUES (new.id, new.content); "
+        "END"
+    )
+    # 为已有数据建立索引
+    op.execute("INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS todos_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS todos_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS todos_fts_ai")
+    op.execute("DROP TABLE IF EXISTS todos_fts")
@@ -0,0 +1,42 @@
+"""Replace single-column todo indexes with composite ones
+
+Revision ID: c3f1a8e5d246
+Revises: b7d2e9f4c1a3
+Create Date: 2026-10-18 14:03:52.907113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1a8e5d246'
+down_revision: Union[str, None] = 'b7d2e9f4c1a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_todos_user_created', 'todos', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_todos_user_list_created', 'todos', ['user_id', 'list_id', 'created_at'], unique=False)
+    op.create_index('ix_todos_user_completed_created', 'todos', ['user_id', 'completed', 'created_at'], unique=False)
+    op.create_index('ix_todos_user_priority', 'todos', ['user_id', 'priority'], unique=False)
+    op.create_index('ix_todos_list_completed', 'todos', ['list_id', 'completed'], unique=False)
+    # 以下索引已被上面的复合索引的前缀覆盖，或选择性太低
+    op.drop_index('ix_todos_user_id', table_name='todos')
+    op.drop_index('ix_todos_list_id', table_name='todos')
+    op.drop_index('ix_todos_completed', table_name='todos')
+    op.drop_index('ix_todos_created_at', table_name='todos')
+
+
+def downgrade() -> None:
+    op.create_index('ix_todos_created_at', 'todos', ['created_at'], unique=False)
+    op.create_index('ix_todos_completed', 'todos', ['completed'], unique=False)
+    op.create_index('ix_todos_list_id', 'todos', ['list_id'], unique=False)
+    op.create_index('ix_todos_user_id', 'todos', ['user_id'], unique=False)
+    op.drop_index('ix_todos_list_completed', table_name='todos')
+    op.drop_index('ix_todos_user_priority', table_name='todos')
+    op.drop_index('ix_todos_user_completed_created', table_name='todos')
+    op.drop_index('ix_todos_user_list_created', table_name='todos')
+    op.drop_index('ix_todos_user_created', table_name='todos')
@@ -0,0 +1,30 @@
+"""Route pending outbox messages to the todo_events exchange
+
+Revision ID: f1b4d8a6c35e
+Revises: e5a9c2d7b813
+Create Date: 2026-10-18 19:02:37.184220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b4d8a6c35e'
+down_revision: Union[str, None] = 'e5a9c2d7b813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 尚未发布的事件改为发往 topic 交换机
+    op.execute(
+        "UPDATE outbox SET queue = 'todo_events' WHERE queue = 'todo_notifications'"
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "UPDATE outbox SET queue = 'todo_notifications' WHERE queue = 'todo_events'"
+    )
@@ -1,39 +1,126 @@
+import base64
+import hashlib
+import hmac
 import json
+import time
 from httpx import AsyncClient, HTTPStatusError, RequestError
-from fastapi import HTTPException, Security, Depends
+from fastapi import (
+    HTTPException,
+    Request,
+    Security,
+    Depends,
+    WebSocket,
+    WebSocketException,
+    status,
+)
 from fastapi.security import OAuth2PasswordBearer
+from pydantic import ValidationError
 from redis.asyncio import Redis
 
+from app.core.config import settings
 from app.core.dependencies import get_http_client
 from app.core.redis_db import get_cache_redis
+from app.core.token_cache import TokenCache
 from app.schemas.schemas import UserRead
 
-# 用户管理微服务的 URL
-USER_SERVICE_URL = "http://127.0.0.1:8000"
+# 进程内 token 缓存，位于 Redis 之前
+token_cache = TokenCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    ttl=settings.TOKEN_CACHE_TTL,
+    negative_ttl=settings.TOKEN_CACHE_NEGATIVE_TTL,
+)
 
 # 定义 OAuth2 令牌 URL
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{USER_SERVICE_URL}/auth/redis/login")
+# auto_error=False：经网关转发的请求可能只携带签名身份头
+oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.USER_SERVICE_URL}/auth/redis/login", auto_error=False
+)
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def verify_identity(value: str) -> UserRead:
+    """校验网关签发的身份头（base64url(payload).base64url(HMAC-SHA256)），无需网络请求"""
+    invalid = HTTPException(status_code=401, detail="Invalid identity header")
+    body, _, signature = value.partition(".")
+    expected = hmac.new(
+        settings.IDENTITY_SECRET.encode(), body.encode(), hashlib.sha256
+    ).digest()
+    try:
+        if not hmac.compare_digest(_b64decode(signature), expected):
+            raise invalid
+        payload = json.loads(_b64decode(body))
+        if payload.pop("exp", 0) < time.time():
+            raise invalid
+        return UserRead.model_validate(payload)
+    except (ValueError, ValidationError):
+        raise invalid
 
 
 async def get_current_user(
-    token: str = Security(oauth2_scheme),
+    request: Request,
+    token: str | None = Security(oauth2_scheme),
     redis: Redis = Depends(get_cache_redis),
     http_client: AsyncClient = Depends(get_http_client),
 ) -> UserRead:
     """通过 Redis 缓存和用户管理微服务验证令牌，获取当前用户信息"""
 
-    # 1. 先查询 Redis 缓存是否已有用户信息
+    # 0. 网关已认证：校验签名身份头即可，无需访问 Redis 或用户服务
+    identity = request.headers.get(settings.IDENTITY_HEADER)
+    if identity and settings.IDENTITY_SECRET:
+        return verify_identity(identity)
+
+    if not token:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # 1. 进程内缓存，同一 token 的并发请求只查询一次
+    return await token_cache.get_or_load(
+        token, lambda: _load_user(token, redis, http_client)
+    )
+
+
+async def get_websocket_user(websocket: WebSocket) -> UserRead:
+    """WebSocket 握手认证：签名身份头，或 ?token= / Authorization 中的 bearer token"""
+    try:
+        identity = websocket.headers.get(settings.IDENTITY_HEADER)
+        if identity and settings.IDENTITY_SECRET:
+            return verify_identity(identity)
+
+        # 浏览器无法为 WebSocket 设置 header，允许通过查询参数传递 token
+        token = websocket.query_params.get("token")
+        if not token:
+            scheme, _, token = websocket.headers.get("authorization", "").partition(" ")
+            if scheme.lower() != "bearer":
+                token = None
+        if not token:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+
+        state = websocket.app.state
+        return await token_cache.get_or_load(
+            token, lambda: _load_user(token, state.cache_redis, state.http_client)
+        )
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+
+
+async def _load_user(token: str, redis: Redis, http_client: AsyncClient) -> UserRead:
+    # 2. 查询 Redis 缓存是否已有用户信息
     cached_user = await redis.get(f"user:{token}")
     if cached_user:
+        token_cache.counters["redis_hits"] += 1
         return UserRead.model_validate(json.loads(cached_user))
 
-    # 2. 如果 Redis 缓存没有用户信息，向用户管理微服务验证令牌
+    # 3. 如果 Redis 缓存没有用户信息，向用户管理微服务验证令牌
     headers = {"Authorization": f"Bearer {token}"}
 
     try:
-        response = await http_client.get(
-            f"{USER_SERVICE_URL}/users/me", headers=headers
-        )
+        response = await http_client.get("/users/me", headers=headers)
         response.raise_for_status()
     except HTTPStatusError as exc:
         raise HTTPException(
@@ -45,7 +132,7 @@ async def get_current_user(
 
     user_data = response.json()
 
-    # 3. 将用户信息缓存到 Redis，并设置过期时间
+    # 4. 将用户信息缓存到 Redis，并设置过期时间
     await redis.setex(f"user:{token}", 3600, json.dumps(user_data))
 
     return UserRead.model_validate(user_data)
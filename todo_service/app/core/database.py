@@ -1,22 +1,142 @@
-import os
+import itertools
 from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from fastapi import Depends
+from redis.asyncio import Redis
+from sqlalchemy import event, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from sqlalchemy.orm import Session
+
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.redis_db import get_cache_redis
+from app.core.replicas import PrimaryStickiness, ReadOnlySession
 from app.models.models import Base, TodoList, Todos
+from app.schemas.schemas import UserRead
+
+
+# DATABASE_URL 未设置时使用环境变量 SQLITE_DB_PATH 指定的 SQLite 数据库
+DATABASE_URL = settings.database_url
+
+
+def _sqlite_pragmas() -> dict:
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "temp_store": settings.SQLITE_TEMP_STORE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+    }
+
+
+def create_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    """Create the async engine used by the service.
+
+    SQLite connections get the pragmas from settings on connect; PostgreSQL
+    (asyncpg) connections are recycled and cache prepared statements. SQL is
+    only echoed when DEBUG is set.
 
+    Args:
+        url (str): database URL.
 
-# 从环境变量获取数据库路径，默认为 data/db.sqlite3
-database_path = os.getenv("SQLITE_DB_PATH", "data/todos.sqlite3")
-SQLITE_DATABASE_URL = f"sqlite+aiosqlite:///{database_path}"
+    Returns:
+        AsyncEngine: the configured engine.
+    """
+    options = {"echo": settings.DEBUG}
+    # 内存数据库使用 StaticPool，不接受连接池参数
+    if ":memory:" not in url:
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    if make_url(url).get_backend_name() == "postgresql":
+        options.update(
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            connect_args={
+                "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+                "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            },
+        )
+    engine = create_async_engine(url, **options)
 
+    if engine.dialect.name == "sqlite":
+        pragmas = _sqlite_pragmas()
 
-engine = create_async_engine(SQLITE_DATABASE_URL, echo=True)
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+
+    return engine
+
+
+class PrimarySession(Session):
+    pass
+
+
+engine = create_engine()
 SessionLocal = async_sessionmaker(
-    class_=AsyncSession, expire_on_commit=False, bind=engine
+    class_=AsyncSession,
+    sync_session_class=PrimarySession,
+    expire_on_commit=False,
+    bind=engine,
 )
 
+# 只读副本按轮询分配；没有配置副本时读请求也走主库
+replica_engines = [create_engine(url) for url in settings.DATABASE_REPLICA_URLS]
+ReplicaSessions = [
+    async_sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=ReadOnlySession,
+        expire_on_commit=False,
+        bind=replica_engine,
+    )
+    for replica_engine in replica_engines
+]
+_next_replica = itertools.cycle(ReplicaSessions)
+stickiness = PrimaryStickiness(settings.READ_YOUR_WRITES_WINDOW)
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def mark_primary_sticky(session):
+    user_id = session.info.get("user_id")
+    if user_id is not None:
+        session.info["committed"] = True
+        stickiness.mark(user_id)
+
+
+async def get_db(
+    current_user: UserRead = Depends(get_current_user),
+    redis: Redis = Depends(get_cache_redis),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session on the primary, for writes and read-after-write."""
+    async with SessionLocal(info={"user_id": current_user.id}) as session:
+        yield session
+        if ReplicaSessions and session.info.get("committed"):
+            await stickiness.share(redis, current_user.id)
+
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with SessionLocal() as session:
+async def get_read_db(
+    current_user: UserRead = Depends(get_current_user),
+    redis: Redis = Depends(get_cache_redis),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Read-only session on a replica, or on the primary when the user wrote recently."""
+    if not ReplicaSessions or await stickiness.is_sticky(redis, current_user.id):
+        async with SessionLocal() as session:
+            yield session
+        return
+    async with next(_next_replica)() as session:
         yield session
 
 
@@ -1,16 +1,24 @@
 from fastapi import Request
 import httpx
 
-# HTTP 客户端依赖
-async def get_http_client(request: Request) -> httpx.AsyncClient:
-    return httpx.AsyncClient()
-
-
-
-
-
-
+from app.core.config import settings
 
 
+def create_http_client() -> httpx.AsyncClient:
+    """创建访问用户服务的共享客户端，由 lifespan 负责关闭"""
+    return httpx.AsyncClient(
+        base_url=settings.USER_SERVICE_URL,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT
+        ),
+    )
 
 
+# HTTP 客户端依赖
+async def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http_client
@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from uuid import UUID
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+
+from app.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class ReadOnlySession(Session):
+    """绑定只读副本的会话，任何写入在 flush 时直接报错."""
+
+    def flush(self, objects=None):
+        if self.new or self.dirty or self.deleted:
+            raise RuntimeError("Read-only session bound to a replica cannot write")
+        super().flush(objects)
+
+
+class PrimaryStickiness:
+    """记录最近写入过的用户，窗口期内其读请求继续走主库.
+
+    提交时先在本进程内标记（同步、立即生效），请求结束时再写入 Redis，
+    让其他 todo_service 实例也能看到.
+    """
+
+    def __init__(self, window: float, max_entries: int = 10000):
+        self.window = window
+        self.max_entries = max_entries
+        self._local: OrderedDict[UUID, float] = OrderedDict()
+
+    @staticmethod
+    def _key(user_id: UUID) -> str:
+        return f"db:primary:{user_id}"
+
+    def mark(self, user_id: UUID) -> None:
+        self._local[user_id] = time.monotonic() + self.window
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def share(self, redis: Redis | None, user_id: UUID) -> None:
+        if redis is None:
+            return
+        try:
+            await redis.set(self._key(user_id), 1, px=int(self.window * 1000))
+        except RedisError as e:
+            logger.warning(f"Failed to share primary stickiness: {e}")
+
+    async def is_sticky(self, redis: Redis | None, user_id: UUID) -> bool:
+        expires_at = self._local.get(user_id)
+        if expires_at is not None:
+            if expires_at > time.monotonic():
+                return True
+            del self._local[user_id]
+        if redis is None:
+            return False
+        try:
+            return bool(await redis.exists(self._key(user_id)))
+        except RedisError as e:
+            # 无法确认时保守地读主库
+            logger.warning(f"Failed to check primary stickiness: {e}")
+            return True
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+
+from app.schemas.schemas import UserRead
+
+
+class TokenCache:
+    """进程内 token -> 用户 的有界 TTL LRU.
+
+    - 同一 token 同时只有一个查询在进行，其余请求等待同一个结果（single-flight）
+    - 无效 token 在 negative_ttl 内直接拒绝，不再访问用户服务
+    """
+
+    def __init__(self, max_entries: int, ttl: float, negative_ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._data: OrderedDict[str, tuple[float, UserRead | HTTPException]] = (
+            OrderedDict()
+        )
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.counters = {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "redis_hits": 0,
+            "coalesced": 0,
+        }
+
+    def _get(self, token: str) -> UserRead | HTTPException | None:
+        item = self._data.get(token)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[token]
+            return None
+        self._data.move_to_end(token)
+        return value
+
+    def _set(self, token: str, value: UserRead | HTTPException, ttl: float) -> None:
+        self._data[token] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(token)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def get_or_load(
+        self, token: str, loader: Callable[[], Awaitable[UserRead]]
+    ) -> UserRead:
+        cached = self._get(token)
+        if isinstance(cached, HTTPException):
+            self.counters["negative_hits"] += 1
+            raise cached
+        if cached is not None:
+            self.counters["hits"] += 1
+            return cached
+
+        task = self._inflight.get(token)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            self.counters["misses"] += 1
+            # 查询在独立任务中运行：发起请求被取消时不会取消其他等待者
+            task = asyncio.create_task(self._load(token, loader))
+            self._inflight[token] = task
+        return await asyncio.shield(task)
+
+    async def _load(
+        self, token: str, loader: Callable[[], Awaitable[UserRead]]
+    ) -> UserRead:
+        try:
+            user = await loader()
+        except HTTPException as e:
+            # 只缓存认证失败，用户服务不可用等临时错误不缓存
+            if e.status_code in (401, 403):
+                self._set(token, e, self.negative_ttl)
+            raise
+        else:
+            self._set(token, user, self.ttl)
+            return user
+        finally:
+            del self._inflight[token]
+
+    def stats(self) -> dict:
+        return {**self.counters, "size": len(self._data)}
@@ -1,14 +1,20 @@
+import asyncio
+
 from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager, AsyncExitStack
 
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.dependencies import create_http_client
 from app.core.logging import setup_logging
 from app.core.redis_db import redis_connect
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, token_cache
 from app.schemas.schemas import UserRead
 from app.routers import lists_routes, todos_route, notification
 from app.utils.migrations import run_migrations
+from app.utils.outbox import OutboxRelay
+from app.utils.rabbitmq import RabbitMQClient
 
 
 # Set up logging configuration
@@ -17,12 +23,34 @@ setup_logging()
 # Optional: Run migrations on startup
 run_migrations()
 
+rabbitmq_client = RabbitMQClient()
+outbox_relay = OutboxRelay(
+    SessionLocal,
+    rabbitmq_client,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL,
+)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     app.state.exit_stack = AsyncExitStack()
     print("启动: 创建 Redis 连接池...")
     app.state.cache_redis = await redis_connect()    
+    # 访问用户服务的共享连接池，随 exit_stack 关闭
+    app.state.http_client = await app.state.exit_stack.enter_async_context(
+        create_http_client()
+    )
+    # 后台发布 outbox 中的事件
+    relay_task = asyncio.create_task(outbox_relay.run())
     yield
+    relay_task.cancel()
+    try:
+        await relay_task
+    except asyncio.CancelledError:
+        pass
+    await notification.notification_hub.close()
+    # 等待缓冲区中的消息发布完再断开
+    await rabbitmq_client.close()
     print("关闭: 释放 Redis 连接池...")
     if app.state.cache_redis:
         await app.state.cache_redis.aclose()
@@ -52,6 +80,18 @@ async def health_check(response: Response):
     return {"status": "ok 👍 "}
 
 
+@app.get("/metrics")
+async def metrics():
+    """进程内计数器"""
+    return {
+        "token_cache": token_cache.stats(),
+        "outbox": outbox_relay.stats(),
+        "publisher": rabbitmq_client.publisher.stats(),
+        "consumer": dict(rabbitmq_client.consumer_counters),
+        "websockets": notification.notification_hub.stats(),
+    }
+
+
 @app.get("/protected-route")
 async def protected_route(current_user: UserRead = Depends(get_current_user)):
     """Protected route"""
@@ -4,11 +4,15 @@ from typing import Optional
 from uuid import UUID
 from sqlalchemy import (
     Boolean,
+    DateTime,
     Integer,
+    JSON,
     String,
     Text,
     Enum,
     ForeignKey,
+    Index,
+    TypeDecorator,
     UniqueConstraint,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship, DeclarativeBase
@@ -19,6 +23,18 @@ class Base(DeclarativeBase):
     pass
 
 
+class UTCDateTime(TypeDecorator):
+    """以不带时区的 UTC 时间存储（PostgreSQL 的 timestamp 不接受带时区的值）."""
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
 class Priority(enum.Enum):
     low = 1
     medium = 2
@@ -32,8 +48,9 @@ class TodoList(Base):
     title: Mapped[str] = mapped_column(String(64), default="My List", nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     user_id: Mapped[UUID] = mapped_column(index=True, nullable=False)
+    # 不随列表自动加载 todos，需要时由 repository 显式批量查询
     todos: Mapped[list["Todos"]] = relationship(
-        "Todos", back_populates="list", cascade="all, delete-orphan", lazy="selectin"
+        "Todos", back_populates="list", cascade="all, delete-orphan", lazy="raise"
     )
     # 唯一约束（确保同一用户的列表标题不重复）
     __table_args__ = (
@@ -53,13 +70,31 @@ class Todos(Base):
         comment="Priority, 1-low, 2-medium, 3-high",
     )
     created_at: Mapped[datetime] = mapped_column(
-        index=True, default=lambda: datetime.now(timezone.utc)
+        UTCDateTime, default=lambda: datetime.now(timezone.utc)
     )
-    completed: Mapped[bool] = mapped_column(
-        Boolean, default=False, index=True, nullable=False
+    completed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    list_id: Mapped[int] = mapped_column(ForeignKey("lists.id"), nullable=False)
+    user_id: Mapped[UUID] = mapped_column(nullable=False)
+    list: Mapped["TodoList"] = relationship("TodoList", back_populates="todos")
+    # 与 repository 的查询形状对应：等值过滤列在前，排序列在后（id 即 rowid，已隐含在索引末尾）
+    __table_args__ = (
+        Index("ix_todos_user_created", "user_id", "created_at"),
+        Index("ix_todos_user_list_created", "user_id", "list_id", "created_at"),
+        Index("ix_todos_user_completed_created", "user_id", "completed", "created_at"),
+        Index("ix_todos_user_priority", "user_id", "priority"),
+        # 列表的计数子查询、按列表删除和外键检查
+        Index("ix_todos_list_completed", "list_id", "completed"),
     )
-    list_id: Mapped[int] = mapped_column(
-        ForeignKey("lists.id"), index=True, nullable=False
+
+
+class OutboxMessage(Base):
+    """待发布到 RabbitMQ 的事件，与业务修改在同一事务中写入，由 relay 发布后删除."""
+
+    __tablename__ = "outbox"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    queue: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, default=lambda: datetime.now(timezone.utc)
     )
-    user_id: Mapped[UUID] = mapped_column(index=True, nullable=False)
-    list: Mapped["TodoList"] = relationship("TodoList", back_populates="todos")
@@ -1,17 +1,41 @@
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from typing import Callable
+
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import AlreadyExistsException, NotFoundException
 from app.models.models import TodoList, Todos
 from app.schemas.schemas import ListCreate, ListUpdate, TodoCreate
+from app.utils.outbox import add_outbox_message
+from app.utils.pagination import cursor_id, decode_cursor, encode_cursor
 
 
 class TodoListRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    @staticmethod
+    def _summary_query(current_user):
+        """Select lists together with their todo counts, computed in SQL."""
+        todo_count = (
+            select(func.count(Todos.id))
+            .where(Todos.list_id == TodoList.id)
+            .correlate(TodoList)
+            .scalar_subquery()
+        )
+        completed_count = (
+            select(func.count(Todos.id))
+            .where(Todos.list_id == TodoList.id, Todos.completed.is_(True))
+            .correlate(TodoList)
+            .scalar_subquery()
+        )
+        return select(
+            TodoList,
+            todo_count.label("todo_count"),
+            completed_count.label("completed_count"),
+        ).where(TodoList.user_id == current_user.id)
+
     async def create(self, data: ListCreate, current_user) -> TodoList:
         """Create a new TodoList item.
 
@@ -40,39 +64,98 @@ class TodoListRepository:
                 f"Todo list with title {data.title} already exists"
             )
 
-    async def get_by_id(self, list_id: int, current_user) -> TodoList:
-        """Get a TodoList by ID for the current user.
+    async def get_by_id(self, list_id: int, current_user):
+        """Get a TodoList by ID for the current user, with its todo counts.
 
         Args:
             list_id: The ID of the TodoList.
-            current_user_id: The ID of the current user.
+            current_user (User): current user.
 
         Returns:
-            Optional[TodoList]: The TodoList if found, otherwise None.
+            Row: (TodoList, todo_count, completed_count).
+
+        Raises:
+            NotFoundException: If the TodoList is not found.
         """
-        query = (
-            select(TodoList).where(
-                TodoList.id == list_id, TodoList.user_id == current_user.id
-            )
-            # .options(selectinload(TodoList.todos))
-        )
-        result = await self.session.scalars(query)
-        list_ = result.one_or_none()
-        if not list_:
+        query = self._summary_query(current_user).where(TodoList.id == list_id)
+        result = await self.session.execute(query)
+        row = result.one_or_none()
+        if not row:
             raise NotFoundException(f"TodoList with id {list_id} not found")
-        return list_
+        return row
+
+    async def get_all(
+        self,
+        current_user,
+        limit: int = 50,
+        cursor: str | None = None,
+        offset: int | None = None,
+    ) -> tuple[list, str | None]:
+        """Get one page of lists with their todo counts, keyset-paginated on id.
+
+        Args:
+            current_user (User): current user.
+            limit (int): maximum number of lists to return.
+            cursor (str | None): cursor returned with the previous page.
+            offset (int | None): offset, only kept for compatibility.
+
+        Returns:
+            tuple[list, str | None]: Rows of (TodoList, todo_count, completed_count)
+                and the cursor of the next page.
+        """
+        query = self._summary_query(current_user)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, 1)
+            query = query.where(TodoList.id > cursor_id(last_id))
+        elif offset:
+            query = query.offset(offset)
+
+        result = await self.session.execute(query.order_by(TodoList.id).limit(limit + 1))
+        rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].TodoList.id)
+        return rows, next_cursor
 
-    async def get_all(self, current_user) -> list[TodoList]:
-        """Get all lists.
+    async def get_todos_for_lists(
+        self, list_ids: list[int], current_user, per_list_limit: int
+    ) -> dict[int, list[Todos]]:
+        """Load the first todos of several lists in one batched query.
+
+        Args:
+            list_ids (list[int]): IDs of the lists.
+            current_user (User): current user.
+            per_list_limit (int): maximum number of todos per list.
 
         Returns:
-            List[TodoList]: List of all todo lists.
+            dict[int, list[Todos]]: Todos grouped by list ID.
         """
-        result = await self.session.scalars(
-            select(TodoList).where(TodoList.user_id == current_user.id)
-            # .options(selectinload(TodoList.todos))
+        todos_by_list: dict[int, list[Todos]] = {list_id: [] for list_id in list_ids}
+        if not list_ids:
+            return todos_by_list
+
+        position = (
+            func.row_number()
+            .over(partition_by=Todos.list_id, order_by=(Todos.created_at, Todos.id))
+            .label("position")
+        )
+        ranked = (
+            select(Todos.id, position)
+            .where(Todos.list_id.in_(list_ids), Todos.user_id == current_user.id)
+            .subquery()
+        )
+        query = (
+            select(Todos)
+            .join(ranked, Todos.id == ranked.c.id)
+            .where(ranked.c.position <= per_list_limit)
+            .order_by(Todos.list_id, Todos.created_at, Todos.id)
         )
-        return result.all()
+        result = await self.session.scalars(query)
+        for todo in result:
+            todos_by_list[todo.list_id].append(todo)
+        return todos_by_list
 
     async def update(self, list_id: int, data: ListUpdate, current_user) -> TodoList:
         """Update an existing TodoList item for the current user.
@@ -89,25 +172,28 @@ class TodoListRepository:
             NotFoundException: If the TodoList is not found or does not belong to the current user.
             ValueError: If no fields are provided for update.
         """
-        query = select(TodoList).where(
-            TodoList.id == list_id, TodoList.user_id == current_user.id
+        update_data = data.model_dump(exclude_unset=True, exclude_none=True)
+        # 确保不修改 id 和 user_id
+        update_data.pop("id", None)
+        update_data.pop("user_id", None)
+        if not update_data:
+            raise ValueError("No fields to update")
+        # 所有权检查放在 WHERE 中，一条 UPDATE ... RETURNING 完成查询、修改和回读
+        query = (
+            update(TodoList)
+            .where(TodoList.id == list_id, TodoList.user_id == current_user.id)
+            .values(**update_data)
+            .returning(TodoList)
+            .execution_options(populate_existing=True)
         )
         result = await self.session.scalars(query)
         list_item = result.one_or_none()
         if not list_item:
+            await self.session.rollback()
             raise NotFoundException(
                 f"TodoList with id {list_id} not found or does not belong to the current user"
             )
-        update_data = data.model_dump(exclude_unset=True, exclude_none=True)
-        # 确保不修改 id 和 user_id
-        update_data.pop("id", None)
-        update_data.pop("user_id", None)
-        if not update_data:
-            raise ValueError("No fields to update")
-        for key, value in update_data.items():
-            setattr(list_item, key, value)
         await self.session.commit()
-        await self.session.refresh(list_item)
         return list_item
 
     async def delete(self, list_id: int, current_user) -> None:
@@ -120,21 +206,39 @@ class TodoListRepository:
         Raises:
             NotFoundException: If the TodoList is not found or does not belong to the current user.
         """
-        list = await self.session.get(TodoList, list_id)
-
-        if not list or list.user_id != current_user.id:
+        owned_list = select(TodoList.id).where(
+            TodoList.id == list_id, TodoList.user_id == current_user.id
+        )
+        # 先删 todos 再删列表（外键），两条语句都带所有权条件
+        await self.session.execute(
+            delete(Todos).where(
+                Todos.list_id == list_id, Todos.list_id.in_(owned_list)
+            )
+        )
+        deleted_id = await self.session.scalar(
+            delete(TodoList)
+            .where(TodoList.id == list_id, TodoList.user_id == current_user.id)
+            .returning(TodoList.id)
+        )
+        if deleted_id is None:
+            await self.session.rollback()
             raise NotFoundException(f"TodoList with id {list_id} not found")
-
-        await self.session.delete(list)  # 触发 ORM 级联删除
         await self.session.commit()
 
-    async def create_todo(self, list_id: int, data: TodoCreate, current_user) -> Todos:
+    async def create_todo(
+        self,
+        list_id: int,
+        data: TodoCreate,
+        current_user,
+        event: Callable[[Todos], dict] | None = None,
+    ) -> Todos:
         """Create a new TodoItem in a specific list for the current user.
 
         Args:
             list_id (int): The ID of the TodoList to create the TodoItem in.
             data (TodoCreate): title and description of the new TodoItem.
             current_user (User): current user.
+            event (Callable | None): builds the outbox event from the new TodoItem.
 
         Returns:
             Todos: newly created TodoItem item.
@@ -151,6 +255,10 @@ class TodoListRepository:
         )
         self.session.add(new_todo)
         try:
+            if event:
+                # flush 后才有 id，事件与 todo 在同一事务中提交
+                await self.session.flush()
+                add_outbox_message(self.session, event(new_todo))
             await self.session.commit()
             await self.session.refresh(new_todo)
             return new_todo
@@ -158,6 +266,57 @@ class TodoListRepository:
             await self.session.rollback()
             raise Exception(f"Database operation failed, create failed {e}")
 
+    async def create_todos(
+        self,
+        list_id: int,
+        items: list[TodoCreate],
+        current_user,
+        event: Callable[[list[Todos]], dict] | None = None,
+    ) -> list[Todos]:
+        """Create several TodoItems in a list with multi-row INSERT ... RETURNING.
+
+        Args:
+            list_id (int): The ID of the TodoList to create the TodoItems in.
+            items (list[TodoCreate]): content and priority of the new TodoItems.
+            current_user (User): current user.
+            event (Callable | None): builds one outbox event from the new TodoItems.
+
+        Returns:
+            list[Todos]: newly created TodoItems, ordered by id.
+
+        Raises:
+            NotFoundException: If the TodoList is not found or does not belong to the current user.
+        """
+        owner = await self.session.scalar(
+            select(TodoList.id).where(
+                TodoList.id == list_id, TodoList.user_id == current_user.id
+            )
+        )
+        if owner is None:
+            raise NotFoundException(f"TodoList with id {list_id} not found")
+
+        rows = [
+            {
+                "content": item.content,
+                "priority": item.priority,
+                "list_id": list_id,
+                "user_id": current_user.id,
+            }
+            for item in items
+        ]
+        try:
+            # insertmanyvalues 按页生成多行 INSERT；不要求 RETURNING 按参数顺序，
+            # 否则 SQLite 会退化为逐行插入。自增 id 按插入顺序分配，排序即可还原
+            result = await self.session.scalars(insert(Todos).returning(Todos), rows)
+            todos = sorted(result.all(), key=lambda todo: todo.id)
+            if event:
+                add_outbox_message(self.session, event(todos))
+            await self.session.commit()
+            return todos
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            raise Exception(f"Database operation failed, create failed {e}")
+
     async def get_todos_by_list_id(self, list_id: int, current_user) -> list[Todos]:
         """Get all TodoItems for the current user in a specific list.
 
@@ -1,11 +1,32 @@
+from datetime import datetime
+from typing import Callable
 from uuid import UUID
 
-from sqlalchemy import select, desc, asc
+from sqlalchemy import delete, select, desc, asc, literal, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.exceptions import NotFoundException
-from app.models.models import Todos
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.models.models import Priority, Todos
 from app.schemas.schemas import TodoUpdate
+from app.utils.outbox import add_outbox_message
+from app.utils.pagination import cursor_id, decode_cursor, encode_cursor
+from app.utils.search import (
+    build_match_query,
+    fts_available,
+    match,
+    snippet,
+    todos_fts,
+)
+
+
+# order_by 参数 -> (排序字段, 方向)，默认按创建时间升序
+TODO_ORDERINGS = {
+    None: (Todos.created_at, asc),
+    "created_at desc": (Todos.created_at, desc),
+    "created_at asc": (Todos.created_at, asc),
+    "priority desc": (Todos.priority, desc),
+    "priority asc": (Todos.priority, asc),
+}
 
 
 class TodosRepository:
@@ -44,8 +65,21 @@ class TodosRepository:
         status: str | None = None,
         search: str | None = None,
         order_by: str | None = None,
-    ) -> list[Todos]:
-        """Get todos based on filters."""
+        limit: int = 50,
+        cursor: str | None = None,
+        offset: int | None = None,
+    ) -> tuple[list[Todos], str | None]:
+        """Get one page of todos based on filters.
+
+        Pages are keyset-paginated on ``(created_at, id)`` or ``(priority, id)``
+        depending on ``order_by``; ``offset`` is only kept for compatibility.
+        ``search`` uses the FTS5 index when it is available: results are
+        ordered by relevance unless ``order_by`` is given, and each todo gets a
+        highlighted ``snippet``. Without the index it falls back to ILIKE.
+
+        Returns:
+            tuple[list[Todos], str | None]: The page of todos and the cursor of the next page.
+        """
 
         query = select(Todos).where(Todos.user_id == user_id)
 
@@ -58,29 +92,80 @@ class TodosRepository:
             elif status == "unfinished":
                 query = query.where(Todos.completed.is_(False))
 
-        if search:
+        match_query = build_match_query(search) if search else None
+        if match_query and await fts_available(self.session):
+            query = (
+                query.add_columns(todos_fts.c.rank, snippet().label("snippet"))
+                .join(todos_fts, todos_fts.c.rowid == Todos.id)
+                .where(match(match_query))
+            )
+        elif search:
+            match_query = None
             query = query.where(Todos.content.ilike(f"%{search}%"))
 
-        if order_by:
-            if order_by == "created_at desc":
-                query = query.order_by(desc(Todos.created_at))
-            elif order_by == "created_at asc":
-                query = query.order_by(asc(Todos.created_at))
-            elif order_by == "priority desc":
-                query = query.order_by(desc(Todos.priority))
-            elif order_by == "priority asc":
-                query = query.order_by(asc(Todos.priority))
+        if match_query and order_by in (None, "relevance"):
+            # bm25 分数越小越相关
+            field, direction = todos_fts.c.rank, asc
+        else:
+            field, direction = TODO_ORDERINGS.get(order_by, TODO_ORDERINGS[None])
+        sort_key = tuple_(field, Todos.id)
+        if cursor:
+            value, last_id = decode_cursor(cursor, 2)
+            # 游标来自另一种排序（或被篡改）时排序键的类型不匹配
+            try:
+                if field is Todos.created_at:
+                    value = datetime.fromisoformat(value)
+                elif field is Todos.priority:
+                    value = Priority[value]
+                elif not isinstance(value, (int, float)) or isinstance(value, bool):
+                    raise ValueError(value)
+            except (KeyError, TypeError, ValueError):
+                raise BadRequestException("Invalid cursor")
+            boundary = tuple_(literal(value, field.type), literal(cursor_id(last_id)))
+            query = query.where(
+                sort_key > boundary if direction is asc else sort_key < boundary
+            )
+        elif offset:
+            query = query.offset(offset)
 
-        result = await self.session.scalars(query)
-        return result.all()
+        query = query.order_by(direction(field), direction(Todos.id)).limit(limit + 1)
+        result = await self.session.execute(query)
+        if match_query:
+            rows = result.all()
+            for row in rows:
+                row.Todos.snippet = row.snippet
+            todos = [row.Todos for row in rows]
+            ranks = [row.rank for row in rows]
+        else:
+            todos = result.scalars().all()
 
-    async def update(self, todo_id: int, data: TodoUpdate, current_user) -> Todos:
+        next_cursor = None
+        if len(todos) > limit:
+            todos = todos[:limit]
+            last = todos[-1]
+            if field is Todos.created_at:
+                key = last.created_at
+            elif field is Todos.priority:
+                key = last.priority.name
+            else:
+                key = ranks[limit - 1]
+            next_cursor = encode_cursor(key, last.id)
+        return todos, next_cursor
+
+    async def update(
+        self,
+        todo_id: int,
+        data: TodoUpdate,
+        current_user,
+        event: Callable[[Todos], dict] | None = None,
+    ) -> Todos:
         """Update an existing TodoItem item for the current user.
 
         Args:
             list_id (int): The ID of the TodoItem to update.
             data (TodoUpdate): The update data containing fields to modify.
             current_user (User): The current user performing the update.
+            event (Callable | None): builds the outbox event from the updated TodoItem.
 
         Returns:
             Todos: The updated TodoItem item.
@@ -89,44 +174,137 @@ class TodosRepository:
             ValueError: If no fields are provided for update.
             NotFoundException: If the TodoItem is not found or does not belong to the current user.
         """
-        query = select(Todos).where(
-            Todos.id == todo_id, Todos.user_id == current_user.id
+        update_data = self._update_values(data)
+        # 所有权检查放在 WHERE 中，一条 UPDATE ... RETURNING 完成查询、修改和回读
+        query = (
+            update(Todos)
+            .where(Todos.id == todo_id, Todos.user_id == current_user.id)
+            .values(**update_data)
+            .returning(Todos)
+            .execution_options(populate_existing=True)
         )
         result = await self.session.scalars(query)
         todo_item = result.one_or_none()
         if not todo_item:
+            await self.session.rollback()
             raise NotFoundException(
                 f"TodoItem with id {todo_id} not found or does not belong to the current user or list"
             )
-        update_data = data.model_dump(exclude_unset=True, exclude_none=True)
-        # 确保不修改 list_id 和 user_id
-        update_data.pop("list_id", None)
-        update_data.pop("user_id", None)
-        if not update_data:
-            raise ValueError("No fields to update")
-        # 动态更新字段
-        for key, value in update_data.items():
-            setattr(todo_item, key, value)
+        if event:
+            add_outbox_message(self.session, event(todo_item))
         await self.session.commit()
-        await self.session.refresh(todo_item)
         return todo_item
 
-    async def delete(self, todo_id: int, current_user) -> None:
+    async def delete(
+        self,
+        todo_id: int,
+        current_user,
+        event: Callable[[int], dict] | None = None,
+    ) -> None:
         """Delete an existing TodoItem for the current user.
 
         Args:
             list_id (int): The ID of the TodoItem to delete.
             current_user (User): The current user performing the deletion.
+            event (Callable | None): builds the outbox event from the deleted ID.
 
         Raises:
             NotFoundException: If the TodoItem is not found or does not belong to the current user.
         """
-        query = select(Todos).where(
-            Todos.id == todo_id, Todos.user_id == current_user.id
+        query = (
+            delete(Todos)
+            .where(Todos.id == todo_id, Todos.user_id == current_user.id)
+            .returning(Todos.id)
         )
-        result = await self.session.scalars(query)
-        todo_item = result.one_or_none()
-        if not todo_item:
+        deleted_id = await self.session.scalar(query)
+        if deleted_id is None:
+            await self.session.rollback()
             raise NotFoundException(f"TodoItem with id {todo_id} not found")
-        await self.session.delete(todo_item)
+        if event:
+            add_outbox_message(self.session, event(deleted_id))
         await self.session.commit()
+
+    async def update_many(
+        self,
+        todo_ids: list[int],
+        data: TodoUpdate,
+        current_user,
+        event: Callable[[list[Todos]], dict] | None = None,
+    ) -> list[Todos]:
+        """Apply the same update to several TodoItems with one UPDATE ... RETURNING.
+
+        Args:
+            todo_ids (list[int]): The IDs of the TodoItems to update.
+            data (TodoUpdate): The update data containing fields to modify.
+            current_user (User): The current user performing the update.
+            event (Callable | None): builds one outbox event from the updated TodoItems.
+
+        Returns:
+            list[Todos]: The updated TodoItems.
+
+        Raises:
+            ValueError: If no fields are provided for update.
+            NotFoundException: If any TodoItem is not found or does not belong to the current user.
+        """
+        update_data = self._update_values(data)
+        query = (
+            update(Todos)
+            .where(Todos.id.in_(todo_ids), Todos.user_id == current_user.id)
+            .values(**update_data)
+            .returning(Todos)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.session.scalars(query)
+        todos = result.all()
+        await self._ensure_all_found(todo_ids, [todo.id for todo in todos])
+        if event:
+            add_outbox_message(self.session, event(todos))
+        await self.session.commit()
+        return todos
+
+    async def delete_many(
+        self,
+        todo_ids: list[int],
+        current_user,
+        event: Callable[[list[int]], dict] | None = None,
+    ) -> None:
+        """Delete several TodoItems with one DELETE statement.
+
+        Args:
+            todo_ids (list[int]): The IDs of the TodoItems to delete.
+            current_user (User): The current user performing the deletion.
+            event (Callable | None): builds one outbox event from the deleted IDs.
+
+        Raises:
+            NotFoundException: If any TodoItem is not found or does not belong to the current user.
+        """
+        query = (
+            delete(Todos)
+            .where(Todos.id.in_(todo_ids), Todos.user_id == current_user.id)
+            .returning(Todos.id)
+        )
+        result = await self.session.scalars(query)
+        deleted_ids = result.all()
+        await self._ensure_all_found(todo_ids, deleted_ids)
+        if event:
+            add_outbox_message(self.session, event(sorted(deleted_ids)))
+        await self.session.commit()
+
+    @staticmethod
+    def _update_values(data: TodoUpdate) -> dict:
+        update_data = data.model_dump(exclude_unset=True, exclude_none=True)
+        # 确保不修改 list_id 和 user_id
+        update_data.pop("list_id", None)
+        update_data.pop("user_id", None)
+        if not update_data:
+            raise ValueError("No fields to update")
+        return update_data
+
+    async def _ensure_all_found(self, requested: list[int], found: list[int]) -> None:
+        """批量操作要么全部成功要么全部回滚"""
+        missing = set(requested) - set(found)
+        if missing:
+            await self.session.rollback()
+            raise NotFoundException(
+                f"TodoItems with ids {sorted(missing)} not found"
+            )
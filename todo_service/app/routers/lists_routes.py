@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, status
+from typing import Annotated
+from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
 from app.core.logging import get_logger
 from app.core.auth import get_current_user
 from app.repository.list_repo import TodoListRepository
 from app.service.list_service import TodoListService
-from app.schemas.schemas import ListCreate, ListUpdate, ListResponse, TodoCreate, TodoResponse, UserRead
+from app.schemas.schemas import ListCreate, ListUpdate, ListPage, ListResponse, TodoBatchCreate, TodoCreate, TodoResponse, UserRead
 
 
 # Set up logger for this module
@@ -22,6 +24,14 @@ def get_list_service(session: AsyncSession = Depends(get_db)) -> TodoListService
     return TodoListService(repository)
 
 
+def get_list_read_service(
+    session: AsyncSession = Depends(get_read_db),
+) -> TodoListService:
+    """Dependency for getting list service instance for read-only endpoints."""
+    repository = TodoListRepository(session)
+    return TodoListService(repository)
+
+
 @router.post("/lists", response_model=ListResponse, status_code=status.HTTP_201_CREATED)
 async def create_list(
     data: ListCreate,
@@ -41,12 +51,23 @@ async def create_list(
 @router.get("/lists/{list_id}", response_model=ListResponse)
 async def get_list(
     list_id: int,
-    service: TodoListService = Depends(get_list_service),
+    include: Annotated[
+        str | None, Query(description="Set to 'todos' to embed the todos")
+    ] = None,
+    todos_limit: Annotated[
+        int, Query(ge=1, description="Embedded todos per list, capped at MAX_PAGE_SIZE")
+    ] = settings.DEFAULT_PAGE_SIZE,
+    service: TodoListService = Depends(get_list_read_service),
     current_user: UserRead = Depends(get_current_user),
 ) -> ListResponse:
     """Get list by id."""
     try:
-        list_ = await service.get_list(list_id=list_id, current_user=current_user)
+        list_ = await service.get_list(
+            list_id=list_id,
+            current_user=current_user,
+            include_todos=include == "todos",
+            todos_limit=min(todos_limit, settings.MAX_PAGE_SIZE),
+        )
         logger.info(f"Retrieved list {list_id}")
         return list_
     except Exception as e:
@@ -54,15 +75,37 @@ async def get_list(
         raise
 
 
-@router.get("/lists", response_model=list[ListResponse])
+@router.get("/lists", response_model=ListPage)
 async def get_all_lists(
-    service: TodoListService = Depends(get_list_service),
+    limit: Annotated[
+        int, Query(ge=1, description="Page size, capped at MAX_PAGE_SIZE")
+    ] = settings.DEFAULT_PAGE_SIZE,
+    cursor: Annotated[
+        str | None, Query(description="next_cursor returned with the previous page")
+    ] = None,
+    offset: Annotated[
+        int | None, Query(ge=0, description="Deprecated, use cursor instead")
+    ] = None,
+    include: Annotated[
+        str | None, Query(description="Set to 'todos' to embed the todos")
+    ] = None,
+    todos_limit: Annotated[
+        int, Query(ge=1, description="Embedded todos per list, capped at MAX_PAGE_SIZE")
+    ] = settings.DEFAULT_PAGE_SIZE,
+    service: TodoListService = Depends(get_list_read_service),
     current_user: UserRead = Depends(get_current_user),
-):
-    """Get all lists."""
+) -> ListPage:
+    """Get one page of lists."""
     try:
-        all_list = await service.get_lists(current_user=current_user)
-        logger.info(f"Retrieved {len(all_list)} lists")
+        all_list = await service.get_lists(
+            current_user=current_user,
+            limit=min(limit, settings.MAX_PAGE_SIZE),
+            cursor=cursor,
+            offset=offset,
+            include_todos=include == "todos",
+            todos_limit=min(todos_limit, settings.MAX_PAGE_SIZE),
+        )
+        logger.info(f"Retrieved {len(all_list.items)} lists")
         return all_list
     except Exception as e:
         logger.error(f"Failed to fetch all lists: {str(e)}")
@@ -86,10 +129,33 @@ async def create_todo(
         raise
 
 
+@router.post(
+    "/lists/{list_id}/todos:batch",
+    response_model=list[TodoResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_todos(
+    list_id: int,
+    data: TodoBatchCreate,
+    service: TodoListService = Depends(get_list_service),
+    current_user: UserRead = Depends(get_current_user),
+) -> list[TodoResponse]:
+    """Create many todos in a specific list in one transaction."""
+    try:
+        created_todos = await service.create_todos(
+            list_id=list_id, items=data.items, current_user=current_user
+        )
+        logger.info(f"Created {len(created_todos)} todo items in list {list_id}")
+        return created_todos
+    except Exception as e:
+        logger.error(f"Failed to create todo items in list {list_id}: {str(e)}")
+        raise
+
+
 @router.get("/lists/{list_id}/todos", response_model=list[TodoResponse])
 async def get_todos_by_list_id(
     list_id: int,
-    service: TodoListService = Depends(get_list_service),
+    service: TodoListService = Depends(get_list_read_service),
     current_user: UserRead = Depends(get_current_user),
 )->list[TodoResponse]:
     """Get all todos in specific list."""
@@ -1,46 +1,54 @@
-import json
-import asyncio
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.utils.rabbitmq import RabbitMQClient
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+
+from app.core.auth import get_websocket_user
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.schemas.schemas import UserRead
+from app.utils.notification_hub import NotificationHub
+from app.utils.rabbitmq import RabbitMQClient, TopicSubscription
 
 logger = get_logger(__name__)
 
 router = APIRouter(tags=["Notifications"])
 
+# 客户端提供该子协议时使用默认窗口批量推送
+BATCH_SUBPROTOCOL = "todo.batch"
 
-active_connections = []
 
-async def process_message_for_websocket(message: dict, websocket: WebSocket, is_active: asyncio.Event):
-    """处理 RabbitMQ 消息，并通过 WebSocket 发送给客户端"""
-    try:
-        if is_active.is_set():
-            message_str = json.dumps(message, ensure_ascii=False)
-            await websocket.send_text(message_str)
-            logger.info(f"Sent message to WebSocket: {message}")
-    except Exception as e:
-        logger.error(f"Failed to send message to WebSocket: {e}")
+# 整个进程共用一个消费者，队列只绑定本实例在线用户的路由键，按 user_id 分发到各个 WebSocket
+notification_hub = NotificationHub(
+    TopicSubscription(RabbitMQClient()),
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    drop_policy=settings.WS_DROP_POLICY,
+)
+
 
 @router.websocket("/notification/todo")
-async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    active_connections.append(websocket)
-    logger.info(f"新的WebSocket连接,当前总数: {len(active_connections)}")
-
-    rabbitmq_client = RabbitMQClient()
-    is_active = asyncio.Event()
-    is_active.set()
-
-    consumer_task = asyncio.create_task(
-        rabbitmq_client.consume_messages(
-            queue="todo_notifications",
-            callback=lambda msg: process_message_for_websocket(msg, websocket, is_active)
-        )
+async def websocket_endpoint(
+    websocket: WebSocket,
+    current_user: UserRead = Depends(get_websocket_user),
+    batch_ms: int | None = Query(None, ge=0, le=settings.WS_MAX_BATCH_WINDOW_MS),
+):
+    """推送当前用户的 todo 事件.
+
+    默认每个事件一帧；通过 ?batch_ms= 或子协议 todo.batch 开启批量模式后，窗口内的
+    事件合并为一个 JSON 数组帧，同一 todo 的多次更新只保留最新状态，窗口内创建又
+    删除的 todo 不再推送。
+    """
+    subprotocol = None
+    if BATCH_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+        subprotocol = BATCH_SUBPROTOCOL
+        if batch_ms is None:
+            batch_ms = settings.WS_BATCH_WINDOW_MS
+    await websocket.accept(subprotocol=subprotocol)
+    subscriber = await notification_hub.register(
+        str(current_user.id), websocket, window=(batch_ms or 0) / 1000
     )
+    logger.info(f"新的WebSocket连接,当前总数: {notification_hub.stats()['connections']}")
 
     try:
         while True:
-            await websocket.receive_text()            
+            await websocket.receive_text()
     except WebSocketDisconnect:
         logger.info("WebSocket 客户端断开连接")
     except Exception as e:
@@ -48,14 +56,7 @@ async def websocket_endpoint(websocket: WebSocket):
         # 仅在服务器端异常时主动关闭 WebSocket
         await websocket.close()
     finally:
-        if websocket in active_connections:
-            active_connections.remove(websocket)
-        is_active.clear()
-        consumer_task.cancel()
-        try:
-            await consumer_task
-        except asyncio.CancelledError:
-            logger.info("RabbitMQ consumer task cancelled")
-        await rabbitmq_client.close()
+        # 只注销当前连接，共享的 RabbitMQ 连接和消费者保持运行
+        await notification_hub.unregister(subscriber)
         # 不在这里调用 websocket.close()，依赖框架处理客户端断开
-        logger.info(f"WebSocket断开,当前总数: {len(active_connections)}")
\ No newline at end of file
+        logger.info(f"WebSocket断开,当前总数: {notification_hub.stats()['connections']}")
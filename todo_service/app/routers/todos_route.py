@@ -2,12 +2,13 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.logging import get_logger
 from app.core.auth import get_current_user
 from app.repository.todo_repo import TodosRepository
 from app.service.todo_service import TodosService
-from app.schemas.schemas import TodoUpdate, TodoResponse, UserRead
+from app.core.config import settings
+from app.schemas.schemas import TodoBatchDelete, TodoBatchUpdate, TodoPage, TodoUpdate, TodoResponse, UserRead
 
 
 # Set up logger for this module
@@ -23,10 +24,18 @@ def get_todos_service(session: AsyncSession = Depends(get_db)) -> TodosService:
     return TodosService(repository)
 
 
+def get_todos_read_service(
+    session: AsyncSession = Depends(get_read_db),
+) -> TodosService:
+    """Dependency for getting todos service instance for read-only endpoints."""
+    repository = TodosRepository(session)
+    return TodosService(repository)
+
+
 @router.get("/todos/{todo_id}", response_model=TodoResponse)
 async def get_todo_by_id(
     todo_id: int,
-    service: TodosService = Depends(get_todos_service),
+    service: TodosService = Depends(get_todos_read_service),
     current_user: UserRead = Depends(get_current_user),
 ) -> TodoResponse:
     """Get todo by id."""
@@ -39,23 +48,32 @@ async def get_todo_by_id(
         raise
 
 
-@router.get("/todos", response_model=list[TodoResponse])
+@router.get("/todos", response_model=TodoPage)
 async def get_all_todos(
     list_id: Annotated[int | None, Query(description="Filter by list ID")] = None,
     status: Annotated[
         str | None, Query(description="Filter by status (unfinished/finished)")
     ] = None,
     search: Annotated[
-        str | None, Query(description="Search todos by title or description")
+        str | None, Query(description="Full-text search on content, prefix matching per word")
     ] = None,
     order_by: Annotated[
-        str | None, Query(description="Order by field (e.g., created_at desc/asc, priority desc/asc)")
+        str | None, Query(description="Order by field (e.g., created_at desc/asc, priority desc/asc, relevance)")
     ] = None,
-    service: TodosService = Depends(get_todos_service),
+    limit: Annotated[
+        int, Query(ge=1, description="Page size, capped at MAX_PAGE_SIZE")
+    ] = settings.DEFAULT_PAGE_SIZE,
+    cursor: Annotated[
+        str | None, Query(description="next_cursor returned with the previous page")
+    ] = None,
+    offset: Annotated[
+        int | None, Query(ge=0, description="Deprecated, use cursor instead")
+    ] = None,
+    service: TodosService = Depends(get_todos_read_service),
     current_user: UserRead = Depends(get_current_user),
-) -> list[TodoResponse]:
+) -> TodoPage:
     """
-    Get all todos with optional filtering and sorting.
+    Get one page of todos with optional filtering and sorting.
     """
     try:
         result = await service.get_todos(
@@ -64,14 +82,52 @@ async def get_all_todos(
             status=status,
             search=search,
             order_by=order_by,
+            limit=min(limit, settings.MAX_PAGE_SIZE),
+            cursor=cursor,
+            offset=offset,
         )
-        logger.info(f"Retrieved {len(result)} todo items")
+        logger.info(f"Retrieved {len(result.items)} todo items")
         return result
     except Exception as e:
         logger.error(f"Failed to fetch todo items: {str(e)}")
         raise
 
 
+@router.patch(
+    "/todos:batch", response_model=list[TodoResponse], status_code=status.HTTP_200_OK
+)
+async def update_todos(
+    data: TodoBatchUpdate,
+    service: TodosService = Depends(get_todos_service),
+    current_user: UserRead = Depends(get_current_user),
+) -> list[TodoResponse]:
+    """Apply the same update to many todos in one transaction."""
+    try:
+        updated_todos = await service.update_todos(
+            todo_ids=data.ids, data=data.changes, current_user=current_user
+        )
+        logger.info(f"Updated {len(updated_todos)} todo items")
+        return updated_todos
+    except Exception as e:
+        logger.error(f"Failed to update todo items: {str(e)}")
+        raise
+
+
+@router.delete("/todos:batch", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_todos(
+    data: TodoBatchDelete,
+    service: TodosService = Depends(get_todos_service),
+    current_user: UserRead = Depends(get_current_user),
+) -> None:
+    """Delete many todos in one transaction."""
+    try:
+        await service.delete_todos(todo_ids=data.ids, current_user=current_user)
+        logger.info(f"Deleted {len(data.ids)} todo items")
+    except Exception as e:
+        logger.error(f"Failed to delete todo items: {str(e)}")
+        raise
+
+
 @router.patch(
     "/todos/{todo_id}", response_model=TodoResponse, status_code=status.HTTP_200_OK
 )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, ConfigDict, field_validator
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, field_validator
 from datetime import datetime
 from uuid import UUID
 
@@ -48,12 +48,26 @@ class TodoUpdate(BaseModel):  # 继承 BaseModel 避免继承 title
             )
 
 
+class TodoBatchCreate(BaseModel):
+    items: list[TodoCreate] = Field(min_length=1)
+
+
+class TodoBatchUpdate(BaseModel):
+    ids: list[int] = Field(min_length=1)
+    changes: TodoUpdate  # 同一组修改应用到所有 ids
+
+
+class TodoBatchDelete(BaseModel):
+    ids: list[int] = Field(min_length=1)
+
+
 class TodoResponse(TodoBase):
     id: int
     list_id: int
     created_at: datetime
     completed: bool
     user_id: UUID
+    snippet: str | None = None  # 仅全文搜索结果带有高亮片段
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -84,6 +98,41 @@ class ListUpdate(BaseModel):  # 继承 BaseModel 避免继承 title
 class ListResponse(ListBase):
     id: int
     user_id: UUID
-    todos: list[TodoResponse] | None = None
+    todo_count: int | None = None
+    completed_count: int | None = None
+    todos: list[TodoResponse] | None = None  # 仅在 ?include=todos 时返回
 
     model_config = ConfigDict(from_attributes=True)
+
+    @classmethod
+    def build(
+        cls,
+        list_,
+        todo_count: int | None = None,
+        completed_count: int | None = None,
+        todos=None,
+    ) -> "ListResponse":
+        """Build from a TodoList without touching its lazy ``todos`` relationship."""
+        return cls(
+            id=list_.id,
+            title=list_.title,
+            description=list_.description,
+            user_id=list_.user_id,
+            todo_count=todo_count,
+            completed_count=completed_count,
+            todos=(
+                [TodoResponse.model_validate(todo) for todo in todos]
+                if todos is not None
+                else None
+            ),
+        )
+
+
+class TodoPage(BaseModel):
+    items: list[TodoResponse]
+    next_cursor: str | None = None
+
+
+class ListPage(BaseModel):
+    items: list[ListResponse]
+    next_cursor: str | None = None
@@ -1,6 +1,9 @@
+from app.core.config import settings
+from app.core.exceptions import BadRequestException
 from app.repository.list_repo import TodoListRepository
-from app.utils.rabbitmq import RabbitMQClient
+from app.utils.events import batch_event, todo_event
 from app.schemas.schemas import (
+    ListPage,
     ListResponse,
     ListCreate,
     ListUpdate,
@@ -14,7 +17,6 @@ class TodoListService:
         """Service layer for list operations."""
 
         self.repository = repository
-        self.rabbitmq = RabbitMQClient()
 
     async def create_list(self, data: ListCreate, current_user) -> ListResponse:
         """Create a new TodoList item.
@@ -28,32 +30,80 @@ class TodoListService:
         """
 
         new_list = await self.repository.create(data, current_user)
-        return ListResponse.model_validate(new_list)
-
-    async def get_list(self, list_id: int, current_user) -> ListResponse:
+        return ListResponse.build(new_list, todo_count=0, completed_count=0)
+
+    async def get_list(
+        self,
+        list_id: int,
+        current_user,
+        include_todos: bool = False,
+        todos_limit: int = 50,
+    ) -> ListResponse:
         """Get a TodoList by ID for the current user.
 
         Args:
             list_id: The ID of the TodoList.
             current_user (User): current user.
+            include_todos (bool): whether to embed the todos of the list.
+            todos_limit (int): maximum number of embedded todos.
 
         Returns:
-            ListResponse: The TodoList if found, otherwise None.
+            ListResponse: The TodoList with its todo counts.
         """
-        list = await self.repository.get_by_id(list_id, current_user)
-        return ListResponse.model_validate(list)
-
-    async def get_lists(self, current_user) -> list[ListResponse]:
-        """Get all lists for the current user.
+        row = await self.repository.get_by_id(list_id, current_user)
+        todos = None
+        if include_todos:
+            todos_by_list = await self.repository.get_todos_for_lists(
+                [list_id], current_user, todos_limit
+            )
+            todos = todos_by_list[list_id]
+        return ListResponse.build(
+            row.TodoList, row.todo_count, row.completed_count, todos
+        )
+
+    async def get_lists(
+        self,
+        current_user,
+        limit: int = 50,
+        cursor: str | None = None,
+        offset: int | None = None,
+        include_todos: bool = False,
+        todos_limit: int = 50,
+    ) -> ListPage:
+        """Get one page of lists for the current user.
 
         Args:
             current_user (User): current user.
+            limit (int): maximum number of lists to return.
+            cursor (str | None): cursor returned with the previous page.
+            offset (int | None): offset, only kept for compatibility.
+            include_todos (bool): whether to embed the todos of each list.
+            todos_limit (int): maximum number of embedded todos per list.
 
         Returns:
-            list[ListResponse]: List of all todo lists.
+            ListPage: The page of todo lists and the cursor of the next page.
         """
-        lists = await self.repository.get_all(current_user)
-        return [ListResponse.model_validate(list) for list in lists]
+        rows, next_cursor = await self.repository.get_all(
+            current_user, limit=limit, cursor=cursor, offset=offset
+        )
+        todos_by_list = {}
+        if include_todos:
+            # 整页列表的 todos 用一条查询批量加载
+            todos_by_list = await self.repository.get_todos_for_lists(
+                [row.TodoList.id for row in rows], current_user, todos_limit
+            )
+        return ListPage(
+            items=[
+                ListResponse.build(
+                    row.TodoList,
+                    row.todo_count,
+                    row.completed_count,
+                    todos_by_list.get(row.TodoList.id),
+                )
+                for row in rows
+            ],
+            next_cursor=next_cursor,
+        )
 
     async def update_list(
         self, list_id: int, data: ListUpdate, current_user
@@ -69,7 +119,7 @@ class TodoListService:
             ListResponse: The updated TodoList item.
         """
         list = await self.repository.update(list_id, data, current_user)
-        return ListResponse.model_validate(list)
+        return ListResponse.build(list)
 
     async def delete_list(self, list_id: int, current_user) -> None:
         """Delete an existing TodoList item for the current user.
@@ -95,20 +145,40 @@ class TodoListService:
         Returns:
             TodoResponse: newly created TodoItem item.
         """
-        todo = await self.repository.create_todo(list_id, data, current_user)
-        if todo:
-            message = {
-                "todo_id": todo.id,
-                "content": todo.content,
-                "priority": str(todo.priority),
-                "completed": todo.completed,                
-                "list_id": todo.list_id,
-                "user_id": str(todo.user_id),
-                "action": "created"
-            }
-            await self.rabbitmq.send_message(message=message, queue="todo_notifications")
+        todo = await self.repository.create_todo(
+            list_id, data, current_user, event=todo_event("created")
+        )
         return TodoResponse.model_validate(todo)
 
+    async def create_todos(
+        self, list_id: int, items: list[TodoCreate], current_user
+    ) -> list[TodoResponse]:
+        """Create several TodoItems in a list in one transaction.
+
+        Args:
+            list_id (int): The ID of the TodoList to create the TodoItems in.
+            items (list[TodoCreate]): content and priority of the new TodoItems.
+            current_user (User): current user.
+
+        Returns:
+            list[TodoResponse]: newly created TodoItems.
+
+        Raises:
+            BadRequestException: If more than MAX_BATCH_SIZE items are given.
+        """
+        if len(items) > settings.MAX_BATCH_SIZE:
+            raise BadRequestException(
+                f"At most {settings.MAX_BATCH_SIZE} todos per batch"
+            )
+        # 整批只发送一条通知
+        todos = await self.repository.create_todos(
+            list_id,
+            items,
+            current_user,
+            event=batch_event("batch_created", current_user.id, list_id),
+        )
+        return [TodoResponse.model_validate(todo) for todo in todos]
+
     async def get_todos_in_list(self, list_id: int, current_user) -> list[TodoResponse]:
         """Get all TodoItems in a given list for the current user.
 
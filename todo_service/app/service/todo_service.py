@@ -1,7 +1,8 @@
+from app.core.config import settings
+from app.core.exceptions import BadRequestException
 from app.repository.todo_repo import TodosRepository
-from app.schemas.schemas import TodoResponse, TodoUpdate
-
-from app.utils.rabbitmq import RabbitMQClient
+from app.schemas.schemas import TodoPage, TodoResponse, TodoUpdate
+from app.utils.events import batch_deleted_event, batch_event, deleted_event, todo_event
 
 
 class TodosService:
@@ -9,7 +10,6 @@ class TodosService:
         """Service layer for todos operations."""
 
         self.repository = repository
-        self.rabbitmq = RabbitMQClient()
 
     async def get_todo(self, todo_id: int, current_user) -> TodoResponse:
         """Get a TodoItem by ID for the current user.
@@ -31,18 +31,27 @@ class TodosService:
         status: str | None = None,
         search: str | None = None,
         order_by: str | None = None,
-    ) -> list[TodoResponse]:
-        """Call repository to get filtered todos."""
+        limit: int = 50,
+        cursor: str | None = None,
+        offset: int | None = None,
+    ) -> TodoPage:
+        """Call repository to get one page of filtered todos."""
 
-        todos = await self.repository.get_all(
+        todos, next_cursor = await self.repository.get_all(
             user_id=current_user.id,
             list_id=list_id,
             status=status,
             search=search,
             order_by=order_by,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
         )
 
-        return [TodoResponse.model_validate(todo) for todo in todos]
+        return TodoPage(
+            items=[TodoResponse.model_validate(todo) for todo in todos],
+            next_cursor=next_cursor,
+        )
 
     async def update_todo(
         self, todo_id: int, data: TodoUpdate, current_user
@@ -57,18 +66,9 @@ class TodosService:
         Returns:
             TodoResponse: The updated TodoItem.
         """
-        updated_todo = await self.repository.update(todo_id, data, current_user)
-        if updated_todo:
-            message = {
-                "todo_id": updated_todo.id,
-                "content": updated_todo.content,
-                "priority": str(updated_todo.priority),
-                "completed": updated_todo.completed,                
-                "list_id": updated_todo.list_id,
-                "user_id": str(updated_todo.user_id),
-                "action": "updated"
-            }
-            await self.rabbitmq.send_message(message=message, queue="todo_notifications")
+        updated_todo = await self.repository.update(
+            todo_id, data, current_user, event=todo_event("updated")
+        )
         return TodoResponse.model_validate(updated_todo)
 
     async def delete_todo(self, todo_id: int, current_user) -> None:
@@ -78,6 +78,48 @@ class TodosService:
             todo_id (int): The ID of the TodoItem to delete.
             current_user (User): The current user performing the deletion.
         """
-        await self.repository.delete(todo_id, current_user)
-        message = {"todo_id": todo_id, "action": "deleted"}
-        await self.rabbitmq.send_message(message=message, queue="todo_notifications")
+        await self.repository.delete(
+            todo_id, current_user, event=deleted_event(current_user.id)
+        )
+
+    async def update_todos(
+        self, todo_ids: list[int], data: TodoUpdate, current_user
+    ) -> list[TodoResponse]:
+        """Apply the same update to several TodoItems in one transaction.
+
+        Args:
+            todo_ids (list[int]): The IDs of the TodoItems to update.
+            data (TodoUpdate): The update data containing fields to modify.
+            current_user (User): The current user performing the update.
+
+        Returns:
+            list[TodoResponse]: The updated TodoItems.
+        """
+        self._check_batch_size(todo_ids)
+        # 整批只发送一条通知
+        todos = await self.repository.update_many(
+            todo_ids,
+            data,
+            current_user,
+            event=batch_event("batch_updated", current_user.id),
+        )
+        return [TodoResponse.model_validate(todo) for todo in todos]
+
+    async def delete_todos(self, todo_ids: list[int], current_user) -> None:
+        """Delete several TodoItems in one transaction.
+
+        Args:
+            todo_ids (list[int]): The IDs of the TodoItems to delete.
+            current_user (User): The current user performing the deletion.
+        """
+        self._check_batch_size(todo_ids)
+        await self.repository.delete_many(
+            todo_ids, current_user, event=batch_deleted_event(current_user.id)
+        )
+
+    @staticmethod
+    def _check_batch_size(todo_ids: list[int]) -> None:
+        if len(todo_ids) > settings.MAX_BATCH_SIZE:
+            raise BadRequestException(
+                f"At most {settings.MAX_BATCH_SIZE} todos per batch"
+            )
@@ -0,0 +1,256 @@
+"""Todo event schema and the codecs used to put events on the wire.
+
+Events are plain dicts with a ``version`` field. The AMQP content-type of
+a message names its codec; messages without one are JSON.
+"""
+
+import json
+import struct
+from typing import Callable
+from uuid import UUID
+
+from app.models.models import Priority, Todos
+
+try:
+    import msgpack
+except ImportError:  # 可选依赖：pip install msgpack
+    msgpack = None
+
+
+EVENT_VERSION = 1
+
+
+def todo_payload(todo: Todos) -> dict:
+    return {
+        "todo_id": todo.id,
+        "content": todo.content,
+        "priority": str(todo.priority),
+        "completed": todo.completed,
+        "list_id": todo.list_id,
+    }
+
+
+def todo_event(action: str) -> Callable[[Todos], dict]:
+    """Build the event of a single created/updated todo."""
+
+    def build(todo: Todos) -> dict:
+        return {
+            "version": EVENT_VERSION,
+            **todo_payload(todo),
+            "user_id": str(todo.user_id),
+            "action": action,
+        }
+
+    return build
+
+
+def deleted_event(user_id: UUID) -> Callable[[int], dict]:
+    def build(todo_id: int) -> dict:
+        return {
+            "version": EVENT_VERSION,
+            "todo_id": todo_id,
+            "user_id": str(user_id),
+            "action": "deleted",
+        }
+
+    return build
+
+
+def batch_event(
+    action: str, user_id: UUID, list_id: int | None = None
+) -> Callable[[list[Todos]], dict]:
+    """Build one event for a batch of created/updated todos."""
+
+    def build(todos: list[Todos]) -> dict:
+        event = {"version": EVENT_VERSION, "user_id": str(user_id), "action": action}
+        if list_id is not None:
+            event["list_id"] = list_id
+        event["todos"] = [todo_payload(todo) for todo in todos]
+        return event
+
+    return build
+
+
+def batch_deleted_event(user_id: UUID) -> Callable[[list[int]], dict]:
+    def build(todo_ids: list[int]) -> dict:
+        return {
+            "version": EVENT_VERSION,
+            "todo_ids": todo_ids,
+            "user_id": str(user_id),
+            "action": "batch_deleted",
+        }
+
+    return build
+
+
+class JsonCodec:
+    content_type = "application/json"
+
+    @staticmethod
+    def encode(event: dict) -> bytes:
+        return json.dumps(event, ensure_ascii=False).encode()  # 防止中文转义
+
+    @staticmethod
+    def decode(body: bytes) -> dict:
+        return json.loads(body)
+
+
+# 事件中的优先级形如 "Priority.low"；紧凑编码中存放枚举值
+PRIORITY_CODES = {str(priority): priority.value for priority in Priority}
+PRIORITY_NAMES = {priority.value: str(priority) for priority in Priority}
+
+
+class MsgpackCodec:
+    """msgpack 编码；user_id 以 16 字节、优先级以整数存放."""
+
+    content_type = "application/msgpack"
+
+    @staticmethod
+    def _todo(todo: dict) -> dict:
+        return {**todo, "priority": PRIORITY_CODES[todo["priority"]]}
+
+    @staticmethod
+    def _expand_todo(todo: dict) -> dict:
+        return {**todo, "priority": PRIORITY_NAMES[todo["priority"]]}
+
+    def encode(self, event: dict) -> bytes:
+        compact = {**event, "user_id": UUID(event["user_id"]).bytes}
+        if "priority" in event:
+            compact["priority"] = PRIORITY_CODES[event["priority"]]
+        if "todos" in event:
+            compact["todos"] = [self._todo(todo) for todo in event["todos"]]
+        return msgpack.packb(compact)
+
+    def decode(self, body: bytes) -> dict:
+        event = msgpack.unpackb(body)
+        event["user_id"] = str(UUID(bytes=event["user_id"]))
+        if "priority" in event:
+            event["priority"] = PRIORITY_NAMES[event["priority"]]
+        if "todos" in event:
+            event["todos"] = [self._expand_todo(todo) for todo in event["todos"]]
+        return event
+
+
+class StructCodec:
+    """固定布局的二进制编码（大端）.
+
+    头部: version(B) action(B) user_id(16s)，之后按 action:
+      created/updated: todo 记录
+      deleted:         todo_id(q)
+      batch_created:   list_id(q) count(I) + count 条 todo 记录
+      batch_updated:   count(I) + count 条 todo 记录
+      batch_deleted:   count(I) + count 个 todo_id(q)
+    todo 记录: todo_id(q) list_id(q) priority(B) completed(?) len(I) + UTF-8 content
+    """
+
+    content_type = "application/x-todo-event"
+
+    ACTIONS = (
+        "created",
+        "updated",
+        "deleted",
+        "batch_created",
+        "batch_updated",
+        "batch_deleted",
+    )
+    HEADER = struct.Struct(">BB16s")
+    TODO = struct.Struct(">qqB?I")
+    ID = struct.Struct(">q")
+    COUNT = struct.Struct(">I")
+
+    def _pack_todo(self, todo: dict) -> bytes:
+        content = todo["content"].encode()
+        return (
+            self.TODO.pack(
+                todo["todo_id"],
+                todo["list_id"],
+                PRIORITY_CODES[todo["priority"]],
+                todo["completed"],
+                len(content),
+            )
+            + content
+        )
+
+    def _unpack_todo(self, body: bytes, offset: int) -> tuple[dict, int]:
+        todo_id, list_id, priority, completed, size = self.TODO.unpack_from(body, offset)
+        offset += self.TODO.size
+        todo = {
+            "todo_id": todo_id,
+            "content": body[offset : offset + size].decode(),
+            "priority": PRIORITY_NAMES[priority],
+            "completed": completed,
+            "list_id": list_id,
+        }
+        return todo, offset + size
+
+    def encode(self, event: dict) -> bytes:
+        action = event["action"]
+        parts = [
+            self.HEADER.pack(
+                event.get("version", EVENT_VERSION),
+                self.ACTIONS.index(action),
+                UUID(event["user_id"]).bytes,
+            )
+        ]
+        if action in ("created", "updated"):
+            parts.append(self._pack_todo(event))
+        elif action == "deleted":
+            parts.append(self.ID.pack(event["todo_id"]))
+        elif action == "batch_deleted":
+            parts.append(self.COUNT.pack(len(event["todo_ids"])))
+            parts.append(struct.pack(f">{len(event['todo_ids'])}q", *event["todo_ids"]))
+        else:
+            if action == "batch_created":
+                parts.append(self.ID.pack(event["list_id"]))
+            parts.append(self.COUNT.pack(len(event["todos"])))
+            parts.extend(self._pack_todo(todo) for todo in event["todos"])
+        return b"".join(parts)
+
+    def decode(self, body: bytes) -> dict:
+        version, action_code, user_id = self.HEADER.unpack_from(body)
+        action = self.ACTIONS[action_code]
+        offset = self.HEADER.size
+        event = {"version": version}
+        if action in ("created", "updated"):
+            todo, offset = self._unpack_todo(body, offset)
+            event.update(todo)
+        elif action == "deleted":
+            (event["todo_id"],) = self.ID.unpack_from(body, offset)
+        elif action == "batch_deleted":
+            (count,) = self.COUNT.unpack_from(body, offset)
+            event["todo_ids"] = list(
+                struct.unpack_from(f">{count}q", body, offset + self.COUNT.size)
+            )
+        else:
+            if action == "batch_created":
+                (event["list_id"],) = self.ID.unpack_from(body, offset)
+                offset += self.ID.size
+            (count,) = self.COUNT.unpack_from(body, offset)
+            offset += self.COUNT.size
+            todos = []
+            for _ in range(count):
+                todo, offset = self._unpack_todo(body, offset)
+                todos.append(todo)
+            event["todos"] = todos
+        event["user_id"] = str(UUID(bytes=user_id))
+        event["action"] = action
+        return event
+
+
+CODECS = {
+    codec.content_type: codec
+    for codec in (JsonCodec(), MsgpackCodec(), StructCodec())
+    if codec.content_type != MsgpackCodec.content_type or msgpack is not None
+}
+
+
+def get_codec(content_type: str | None):
+    """Codec for an AMQP content-type; messages without one are JSON.
+
+    Raises:
+        ValueError: If the content-type has no codec (or msgpack is not installed).
+    """
+    codec = CODECS.get(content_type or JsonCodec.content_type)
+    if codec is None:
+        raise ValueError(f"Unsupported event content-type: {content_type}")
+    return codec
@@ -0,0 +1,276 @@
+import asyncio
+import itertools
+import json
+from collections import OrderedDict, defaultdict
+from typing import Awaitable, Callable, Literal, Protocol
+
+from fastapi import WebSocket, status
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# 可按 todo_id 合并的单条事件
+COALESCED_ACTIONS = {"created", "updated", "deleted"}
+
+
+class Subscriber:
+    """一个 WebSocket 连接及其有界发送队列.
+
+    window > 0 时为批量模式：事件先按 todo_id 合并到 pending，窗口结束后作为一个
+    JSON 数组帧发送。
+    """
+
+    def __init__(
+        self, user_id: str, websocket: WebSocket, queue_size: int, window: float = 0
+    ):
+        self.user_id = user_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.window = window
+        self.queue_size = queue_size
+        # 窗口内按到达顺序排列: key -> (action, 已序列化的事件)
+        self.pending: OrderedDict[int, tuple[str, str]] = OrderedDict()
+        # todo_id -> 仍可合并的单条事件在 pending 中的 key
+        self.mergeable: dict[object, int] = {}
+        self.ready = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self.dropped = 0
+        self.closing = False  # disconnect 策略下已开始关闭
+
+
+class Subscription(Protocol):
+    async def consume(self, callback: Callable[[dict], Awaitable[None]]) -> None: ...
+
+    async def bind(self, user_id: str) -> None: ...
+
+    async def unbind(self, user_id: str) -> None: ...
+
+
+class NotificationHub:
+    """每个进程一个 RabbitMQ 消费者，按 user_id 把消息分发给该用户的所有 WebSocket.
+
+    每条消息只解码、序列化一次；每个连接有自己的发送任务和有界队列，慢客户端不会
+    阻塞消费者和其他连接。队列写满时按 drop_policy 丢弃最旧的消息或断开该连接。
+    用户的第一个连接建立时把其路由键绑定到本实例的队列，最后一个连接断开时解绑。
+    """
+
+    def __init__(
+        self,
+        subscription: Subscription,
+        queue_size: int,
+        drop_policy: Literal["drop_oldest", "disconnect"] = "drop_oldest",
+        retry_delay: float = 5.0,
+    ):
+        self.subscription = subscription
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.retry_delay = retry_delay
+        self.connections: dict[str, set[Subscriber]] = defaultdict(set)
+        self._consumer: asyncio.Task | None = None
+        self.counters = {
+            "received": 0,
+            "sent": 0,
+            "frames": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "unrouted": 0,
+        }
+        self._keys = itertools.count()
+
+    async def register(
+        self, user_id: str, websocket: WebSocket, window: float = 0
+    ) -> Subscriber:
+        """Register an accepted WebSocket and start its sender task.
+
+        Args:
+            user_id (str): owner of the connection.
+            websocket (WebSocket): the accepted connection.
+            window (float): flush window in seconds; 0 sends one frame per event.
+
+        Returns:
+            Subscriber: handle to pass to unregister.
+        """
+        subscriber = Subscriber(user_id, websocket, self.queue_size, window)
+        send_loop = self._batch_send_loop if window > 0 else self._send_loop
+        subscriber.task = asyncio.create_task(send_loop(subscriber))
+        first = user_id not in self.connections
+        self.connections[user_id].add(subscriber)
+        if first:
+            await self._update_binding(self.subscription.bind, user_id)
+        # 第一个连接到来时才启动消费者，服务启动不依赖 broker
+        if self._consumer is None or self._consumer.done():
+            self._consumer = asyncio.create_task(self._consume_loop())
+        return subscriber
+
+    async def unregister(self, subscriber: Subscriber) -> None:
+        subscribers = self.connections.get(subscriber.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.connections[subscriber.user_id]
+                await self._update_binding(self.subscription.unbind, subscriber.user_id)
+        await self._cancel(subscriber.task)
+
+    @staticmethod
+    async def _update_binding(update, user_id: str) -> None:
+        # 绑定失败时消费者重连后会按当前用户重新绑定
+        try:
+            await update(user_id)
+        except Exception as e:
+            logger.error(f"Failed to update binding for user {user_id}: {e}")
+
+    async def dispatch(self, message: dict) -> None:
+        """Queue one decoded message for every connection of its user."""
+        self.counters["received"] += 1
+        subscribers = self.connections.get(str(message.get("user_id")))
+        if not subscribers:
+            self.counters["unrouted"] += 1
+            return
+        # 序列化一次，所有连接（包括批量模式的数组帧）共用同一个字符串
+        text = json.dumps(message, ensure_ascii=False)
+        for subscriber in list(subscribers):
+            if subscriber.window > 0:
+                self._coalesce(subscriber, message, text)
+            else:
+                self._offer(subscriber, text)
+
+    def _offer(self, subscriber: Subscriber, text: str) -> None:
+        try:
+            subscriber.queue.put_nowait(text)
+            return
+        except asyncio.QueueFull:
+            pass
+        self._drop(subscriber)
+        if self.drop_policy == "drop_oldest":
+            subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(text)
+
+    def _coalesce(self, subscriber: Subscriber, message: dict, text: str) -> None:
+        """Merge an event into the pending window of a batching connection.
+
+        Single-todo events merge in place into the earlier event of the same
+        todo. A batch event that touches a todo is a barrier: later events of
+        that todo start a new entry, so nothing is reordered across the batch.
+        """
+        action = message.get("action")
+        if action in COALESCED_ACTIONS:
+            todo_id = message.get("todo_id")
+            key = subscriber.mergeable.get(todo_id)
+            previous = subscriber.pending.get(key) if key is not None else None
+            if previous is not None:
+                self.counters["coalesced"] += 1
+                if previous[0] == "created":
+                    if action == "deleted":
+                        # 窗口内创建又删除，且期间没有批量事件引用它，客户端无需知道
+                        del subscriber.pending[key]
+                        del subscriber.mergeable[todo_id]
+                        return
+                    # 仍以 created 通知，内容取最新状态
+                    action = "created"
+                    text = json.dumps({**message, "action": action}, ensure_ascii=False)
+                subscriber.pending[key] = (action, text)
+                return
+        else:
+            for todo_id in self._todo_ids(message):
+                subscriber.mergeable.pop(todo_id, None)
+
+        if len(subscriber.pending) >= subscriber.queue_size:
+            self._drop(subscriber)
+            if self.drop_policy != "drop_oldest":
+                return
+            subscriber.pending.popitem(last=False)
+        key = next(self._keys)
+        subscriber.pending[key] = (action, text)
+        if action in COALESCED_ACTIONS:
+            subscriber.mergeable[message.get("todo_id")] = key
+        subscriber.ready.set()
+
+    @staticmethod
+    def _todo_ids(message: dict) -> list:
+        if "todo_ids" in message:
+            return message["todo_ids"]
+        return [todo.get("todo_id") for todo in message.get("todos", [])]
+
+    def _drop(self, subscriber: Subscriber) -> None:
+        subscriber.dropped += 1
+        self.counters["dropped"] += 1
+        if self.drop_policy == "disconnect" and not subscriber.closing:
+            # 断开慢客户端（只关闭一次，关闭握手期间到达的消息直接丢弃）；
+            # 端点收到断开后会调用 unregister
+            subscriber.closing = True
+            logger.warning(f"Disconnecting slow WebSocket client of user {subscriber.user_id}")
+            subscriber.task.cancel()
+            subscriber.task = asyncio.create_task(
+                subscriber.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            )
+
+    async def _send_loop(self, subscriber: Subscriber) -> None:
+        while True:
+            text = await subscriber.queue.get()
+            try:
+                await subscriber.websocket.send_text(text)
+            except Exception as e:
+                logger.error(f"Failed to send message to WebSocket: {e}")
+                return
+            self.counters["sent"] += 1
+            self.counters["frames"] += 1
+            logger.debug(f"Sent message to WebSocket: {text}")
+
+    async def _batch_send_loop(self, subscriber: Subscriber) -> None:
+        while True:
+            await subscriber.ready.wait()
+            # 第一个事件到达后开始计时，窗口内的事件一起发送
+            await asyncio.sleep(subscriber.window)
+            texts = [text for _, text in subscriber.pending.values()]
+            subscriber.pending.clear()
+            subscriber.mergeable.clear()
+            subscriber.ready.clear()
+            if not texts:
+                continue
+            try:
+                await subscriber.websocket.send_text(f"[{','.join(texts)}]")
+            except Exception as e:
+                logger.error(f"Failed to send message to WebSocket: {e}")
+                return
+            self.counters["sent"] += len(texts)
+            self.counters["frames"] += 1
+
+    async def _consume_loop(self) -> None:
+        while True:
+            try:
+                await self.subscription.consume(self.dispatch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification consumer stopped, retrying: {e}")
+            await asyncio.sleep(self.retry_delay)
+
+    async def close(self) -> None:
+        """Stop the consumer and every sender task."""
+        await self._cancel(self._consumer)
+        self._consumer = None
+        for subscribers in list(self.connections.values()):
+            for subscriber in list(subscribers):
+                await self.unregister(subscriber)
+
+    @staticmethod
+    async def _cancel(task: asyncio.Task | None) -> None:
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"WebSocket task failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "users": len(self.connections),
+            "connections": sum(len(s) for s in self.connections.values()),
+            "consumer_running": self._consumer is not None and not self._consumer.done(),
+        }
@@ -0,0 +1,122 @@
+import asyncio
+from collections import defaultdict
+from typing import Protocol
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.logging import get_logger
+from app.models.models import OutboxMessage
+from app.utils.rabbitmq import TODO_EXCHANGE
+
+logger = get_logger(__name__)
+
+# 有新事件提交时唤醒 relay，避免只能靠轮询发现
+_wakeup = asyncio.Event()
+
+
+def add_outbox_message(
+    session: AsyncSession, message: dict, queue: str = TODO_EXCHANGE
+) -> None:
+    """Stage an event in the outbox; it is stored by the caller's next commit.
+
+    Args:
+        session (AsyncSession): session of the business transaction.
+        message (dict): JSON-serializable event payload.
+        queue (str): queue (or exchange) the relay publishes the event to.
+    """
+    session.add(OutboxMessage(queue=queue, payload=message))
+    session.info["outbox_pending"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_relay(session):
+    if session.info.pop("outbox_pending", False):
+        _wakeup.set()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop("outbox_pending", None)
+
+
+class Publisher(Protocol):
+    async def send_messages(self, messages: list[dict], queue: str) -> None: ...
+
+
+class OutboxRelay:
+    """把 outbox 中已提交的事件按批发布到 RabbitMQ，发布成功后删除.
+
+    发布与删除不在同一事务中，进程在两者之间退出时事件会重发（至少一次），
+    消费方需按 action + id 幂等处理。
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        publisher: Publisher,
+        batch_size: int,
+        poll_interval: float,
+    ):
+        self.session_factory = session_factory
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.counters = {"published": 0, "batches": 0, "failures": 0}
+
+    async def relay_once(self) -> int:
+        """Publish and delete one batch of outbox messages.
+
+        Returns:
+            int: number of messages published.
+        """
+        async with self.session_factory() as session:
+            # 多个实例同时运行时各自领取不同的行（SQLite 忽略该子句）
+            query = (
+                select(OutboxMessage)
+                .order_by(OutboxMessage.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            messages = (await session.scalars(query)).all()
+            if not messages:
+                return 0
+
+            by_queue: dict[str, list[dict]] = defaultdict(list)
+            for message in messages:
+                by_queue[message.queue].append(message.payload)
+            for queue, payloads in by_queue.items():
+                await self.publisher.send_messages(payloads, queue)
+
+            await session.execute(
+                delete(OutboxMessage).where(
+                    OutboxMessage.id.in_([message.id for message in messages])
+                )
+            )
+            await session.commit()
+
+        self.counters["published"] += len(messages)
+        self.counters["batches"] += 1
+        return len(messages)
+
+    async def run(self) -> None:
+        """Drain the outbox until cancelled; wakes on commits or every poll_interval."""
+        while True:
+            _wakeup.clear()
+            try:
+                # 一批满了说明可能还有积压，立即继续
+                if await self.relay_once() == self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["failures"] += 1
+                logger.error(f"Failed to relay outbox messages: {e}")
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return dict(self.counters)
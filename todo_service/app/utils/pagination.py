@@ -0,0 +1,32 @@
+import base64
+import json
+from datetime import datetime
+
+from app.core.exceptions import BadRequestException
+
+
+def encode_cursor(*values) -> str:
+    """将排序键编码为不透明的游标"""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """解码游标，返回编码时的排序键列表"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise BadRequestException("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise BadRequestException("Invalid cursor")
+    return values
+
+
+def cursor_id(value) -> int:
+    """校验游标中的 id；游标可被客户端篡改，不能直接用于查询"""
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise BadRequestException("Invalid cursor")
+    return value
@@ -0,0 +1,54 @@
+import re
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# 由迁移 b7d2e9f4c1a3 创建的 FTS5 外部内容表，触发器与 todos.content 保持同步
+FTS_TABLE = "todos_fts"
+todos_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+SNIPPET_TOKENS = 10
+
+# 每个 engine 只检查一次 FTS 表是否存在
+_fts_available: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def build_match_query(search: str) -> str | None:
+    """把用户输入转换为 FTS5 查询：每个词加引号并做前缀匹配，词之间为 AND.
+
+    引号避免用户输入被解析为 FTS5 语法；没有可检索的词时返回 None.
+    """
+    terms = re.findall(r"\w+", search)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def match(query: str):
+    return literal_column(FTS_TABLE).op("MATCH")(query)
+
+
+def snippet():
+    return func.snippet(
+        literal_column(FTS_TABLE), 0, SNIPPET_START, SNIPPET_END, "…", SNIPPET_TOKENS
+    )
+
+
+async def fts_available(session: AsyncSession) -> bool:
+    """FTS 表是否可用（非 SQLite、SQLite 未编译 FTS5 或迁移未执行时为 False）."""
+    engine = session.bind.sync_engine
+    available = _fts_available.get(engine)
+    if available is None:
+        available = False
+        if engine.dialect.name == "sqlite":
+            result = await session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE},
+            )
+            available = result.scalar() is not None
+        _fts_available[engine] = available
+    return available
@@ -0,0 +1,85 @@
+"""SQLite 引擎基准: aiosqlite 默认配置 vs create_engine（WAL、pragma、连接池）.
+
+并发任务各自通过 repository 写入 todos（每条单独提交），再并发分页读取.
+
+用法 (在 todo_service 目录下):
+    python benchmarks/bench_engine.py --concurrency 32 --writes 200 --reads 200
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.core.database import create_engine  # noqa: E402
+from app.models.models import Base, TodoList  # noqa: E402
+from app.repository.list_repo import TodoListRepository  # noqa: E402
+from app.repository.todo_repo import TodosRepository  # noqa: E402
+from app.schemas.schemas import TodoCreate  # noqa: E402
+
+
+async def run(label: str, engine, concurrency: int, writes: int, reads: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    users = [SimpleNamespace(id=uuid.uuid4()) for _ in range(concurrency)]
+
+    list_ids = []
+    async with sessions() as session:
+        for user in users:
+            todo_list = TodoList(title="Inbox", user_id=user.id)
+            session.add(todo_list)
+            await session.flush()
+            list_ids.append(todo_list.id)
+        await session.commit()
+
+    async def writer(user, list_id):
+        for i in range(writes):
+            async with sessions() as session:
+                await TodoListRepository(session).create_todo(
+                    list_id, TodoCreate(content=f"todo {i}", priority="low"), user
+                )
+
+    async def reader(user):
+        for _ in range(reads):
+            async with sessions() as session:
+                await TodosRepository(session).get_all(user_id=user.id, limit=50)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(u, l) for u, l in zip(users, list_ids)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} write {concurrency * writes / elapsed:9.0f} commits/s")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(reader(u) for u in users))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} read  {concurrency * reads / elapsed:9.0f} pages/s")
+    await engine.dispose()
+
+
+async def main(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        default = create_async_engine(f"sqlite+aiosqlite:///{tmp}/default.sqlite3")
+        await run("default", default, args.concurrency, args.writes, args.reads)
+        tuned = create_engine(f"sqlite+aiosqlite:///{tmp}/tuned.sqlite3")
+        await run("tuned", tuned, args.concurrency, args.writes, args.reads)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
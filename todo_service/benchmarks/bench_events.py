@@ -0,0 +1,89 @@
+"""事件编码基准: 每种 codec 编码 + 解码一条 todo 事件的 CPU 时间和消息大小.
+
+对比 JSON、msgpack（已安装时）与固定布局的 struct 编码，事件包括单条
+created 和含 N 条 todo 的 batch_created；另外给出 WebSocket 分发时每个事件
+只序列化一次与按接收者逐个序列化的开销.
+
+用法 (在 todo_service 目录下):
+    python benchmarks/bench_events.py --iterations 100000 --batch 100 --recipients 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.models import Priority  # noqa: E402
+from app.utils.events import CODECS, batch_event, todo_event  # noqa: E402
+
+
+def make_todo(i: int, user_id: uuid.UUID):
+    return SimpleNamespace(
+        id=1_000_000 + i,
+        content=f"buy milk and eggs #{i}",
+        priority=list(Priority)[i % 3],
+        completed=i % 2 == 0,
+        list_id=42,
+        user_id=user_id,
+    )
+
+
+def per_call_us(func, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def bench_codecs(label: str, event: dict, iterations: int) -> None:
+    print(f"\n{label}")
+    print(f"{'codec':<28}{'bytes':>8}{'encode us':>12}{'decode us':>12}")
+    for content_type, codec in CODECS.items():
+        body = codec.encode(event)
+        assert codec.decode(body) == event
+        encode = per_call_us(lambda: codec.encode(event), iterations)
+        decode = per_call_us(lambda: codec.decode(body), iterations)
+        print(f"{content_type:<28}{len(body):>8}{encode:>12.2f}{decode:>12.2f}")
+
+
+def bench_fanout(event: dict, recipients: int, iterations: int) -> None:
+    def per_recipient():
+        for _ in range(recipients):
+            json.dumps(event, ensure_ascii=False)
+
+    def once():
+        text = json.dumps(event, ensure_ascii=False)
+        for _ in range(recipients):
+            text  # noqa: B018  所有接收者共用同一个字符串
+
+    print(f"\nWebSocket fan-out to {recipients} sockets (us per event)")
+    print(f"  serialize per recipient: {per_call_us(per_recipient, iterations):10.2f}")
+    print(f"  serialize once:          {per_call_us(once, iterations):10.2f}")
+
+
+def main(args) -> None:
+    user_id = uuid.uuid4()
+    single = todo_event("created")(make_todo(0, user_id))
+    batch = batch_event("batch_created", user_id, 42)(
+        [make_todo(i, user_id) for i in range(args.batch)]
+    )
+    bench_codecs("created", single, args.iterations)
+    bench_codecs(
+        f"batch_created ({args.batch} todos)",
+        batch,
+        max(1, args.iterations // args.batch),
+    )
+    bench_fanout(single, args.recipients, max(1, args.iterations // 10))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--recipients", type=int, default=50)
+    main(parser.parse_args())
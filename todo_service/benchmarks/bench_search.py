@@ -0,0 +1,130 @@
+"""全文搜索基准: content LIKE '%term%' 扫描 vs FTS5 索引.
+
+生成 N 条合成 todos（执行真实的 Alembic 迁移建表），再对同一批搜索词分别执行
+repository 在两种模式下生成的 SQL.
+
+用法 (在 todo_service 目录下):
+    python benchmarks/bench_search.py --rows 1000000 --users 10
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+
+from app.utils.search import build_match_query  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SYLLABLES = ["ba", "ko", "mi", "ru", "te", "sa", "no", "li", "pe", "da", "go", "fu"]
+
+# 与 TodosRepository.get_all 的两条路径一致（默认每页 50 条，多取一条判断下一页）
+ILIKE_SQL = """
+SELECT todos.* FROM todos
+WHERE todos.user_id = ? AND lower(todos.content) LIKE lower(?)
+ORDER BY todos.created_at, todos.id LIMIT 51
+"""
+FTS_SQL = """
+SELECT todos.*, todos_fts.rank,
+       snippet(todos_fts, 0, '<mark>', '</mark>', '…', 10) AS snippet
+FROM todos JOIN todos_fts ON todos_fts.rowid = todos.id
+WHERE todos.user_id = ? AND todos_fts MATCH ?
+ORDER BY todos_fts.rank, todos.id LIMIT 51
+"""
+
+
+def build_vocabulary(rng: random.Random, size: int) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def create_database(path: str, rows: int, users: list[str], words: list[str]) -> None:
+    config = Config()
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    config.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{path}")
+    command.upgrade(config, "head")
+
+    rng = random.Random(1)
+    start = datetime(2025, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO lists (id, title, user_id) VALUES (?, 'Inbox', ?)",
+        list(enumerate(users, start=1)),
+    )
+
+    def generate():
+        for i in range(rows):
+            user = i % len(users)
+            content = " ".join(rng.choice(words) for _ in range(rng.randint(2, 6)))[:64]
+            yield (
+                content,
+                rng.choice(["low", "medium", "high"]),
+                (start + timedelta(seconds=i)).isoformat(sep=" "),
+                rng.random() < 0.3,
+                user + 1,
+                users[user],
+            )
+
+    # 触发器同步写入 FTS 索引，写入耗时也一并体现
+    begin = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO todos (content, priority, created_at, completed, list_id, user_id) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        generate(),
+    )
+    conn.commit()
+    print(f"inserted {rows} rows in {time.perf_counter() - begin:.1f}s")
+    conn.close()
+
+
+def bench(label: str, conn: sqlite3.Connection, sql: str, params: list[tuple]) -> None:
+    matched = 0
+    start = time.perf_counter()
+    for p in params:
+        matched += len(conn.execute(sql, p).fetchall())
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<8} {elapsed / len(params) * 1e3:8.2f} ms/query "
+        f"({matched / len(params):.1f} rows/query)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--words", type=int, default=5_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = build_vocabulary(rng, args.words)
+    # SQLite 中 Uuid 列以不带连字符的 32 位十六进制存储
+    users = [uuid.UUID(int=rng.getrandbits(128)).hex for _ in range(args.users)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        create_database(path, args.rows, users, words)
+        conn = sqlite3.connect(path)
+
+        for kind in ("word", "prefix"):
+            terms = [rng.choice(words) for _ in range(args.queries)]
+            if kind == "prefix":
+                terms = [term[:3] for term in terms]
+            ilike = [(rng.choice(users), f"%{term}%") for term in terms]
+            fts = [(user, build_match_query(term)) for (user, _), term in zip(ilike, terms)]
+            print(f"-- {kind} queries")
+            bench("ilike", conn, ILIKE_SQL, ilike)
+            bench("fts", conn, FTS_SQL, fts)
+        conn.close()
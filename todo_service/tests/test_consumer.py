@@ -0,0 +1,189 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.utils.rabbitmq import ATTEMPTS_HEADER, RabbitMQClient, retry_delay
+
+
+class FakeIncomingMessage:
+    def __init__(
+        self, body: bytes, headers: dict | None = None, routing_key: str = "events"
+    ):
+        self.body = body
+        self.headers = headers or {}
+        self.routing_key = routing_key
+        self.content_type = "application/json"
+        self.acked = self.nacked = False
+
+    async def ack(self) -> None:
+        self.acked = True
+
+    async def nack(self, requeue: bool = True) -> None:
+        self.nacked = True
+
+
+class FakeExchange:
+    def __init__(self, channel: "FakeChannel", name: str):
+        self.channel = channel
+        self.name = name
+
+    async def publish(self, message, routing_key: str) -> None:
+        self.channel.published.append((self.name, routing_key, message))
+
+
+class FakeQueue:
+    def __init__(self, channel: "FakeChannel", name: str):
+        self.channel = channel
+        self.name = name
+
+    async def bind(self, exchange: FakeExchange, routing_key: str | None = None) -> None:
+        self.channel.bindings.append((exchange.name, self.name))
+
+
+class FakeChannel:
+    """记录声明的交换机、队列、绑定和发布的消息"""
+
+    def __init__(self):
+        self.exchanges: dict[str, object] = {}
+        self.queues: dict[str, dict] = {}
+        self.bindings: list[tuple[str, str]] = []
+        self.published: list[tuple[str, str, object]] = []
+        self.default_exchange = FakeExchange(self, "")
+
+    async def declare_exchange(self, name: str, type, durable=False, auto_delete=False):
+        self.exchanges[name] = type
+        return FakeExchange(self, name)
+
+    async def declare_queue(self, name: str, durable: bool = False, arguments=None):
+        if name.startswith("amq."):
+            # 与 broker 一致：拒绝声明 amq.* 队列
+            raise PermissionError(f"ACCESS_REFUSED - reserved queue name {name}")
+        self.queues[name] = arguments or {}
+        return FakeQueue(self, name)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = RabbitMQClient()
+    channel = FakeChannel()
+    monkeypatch.setattr(client, "channel", channel)
+    monkeypatch.setattr(client, "publish_channel", channel)
+    monkeypatch.setattr(
+        client, "consumer_counters", {k: 0 for k in client.consumer_counters}
+    )
+    return client
+
+
+def test_retry_delay_backs_off_exponentially(monkeypatch):
+    monkeypatch.setattr(settings, "CONSUMER_RETRY_BASE_DELAY", 0.5)
+    monkeypatch.setattr(settings, "CONSUMER_RETRY_MAX_DELAY", 3.0)
+    assert [retry_delay(n) for n in range(1, 6)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+@pytest.mark.asyncio
+async def test_failed_message_is_retried_then_dead_lettered(client, monkeypatch):
+    monkeypatch.setattr(settings, "CONSUMER_MAX_ATTEMPTS", 3)
+
+    async def fail(message):
+        raise RuntimeError("boom")
+
+    handler = client.message_handler("events", fail)
+    message = FakeIncomingMessage(b'{"user_id": "alice"}')
+    for _ in range(3):
+        await handler(message)
+        assert message.acked and not message.nacked
+        # 下一次投递的是带着新尝试次数的副本
+        _, _, copy = client.channel.published[-1]
+        message = FakeIncomingMessage(copy.body, copy.headers)
+
+    routes = [routing_key for _, routing_key, _ in client.channel.published]
+    assert routes == ["events.retry.1000ms", "events.retry.2000ms", "events.dlq"]
+    assert client.channel.queues["events.retry.1000ms"]["x-dead-letter-routing-key"] == "events"
+    assert message.headers[ATTEMPTS_HEADER] == 2
+    assert message.headers["x-error"] == "boom"
+    assert client.consumer_counters == {
+        "acked": 0,
+        "retried": 2,
+        "dead_lettered": 1,
+        "requeued": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_handler_limits_concurrency_and_dead_letters_bad_json(client, monkeypatch):
+    monkeypatch.setattr(settings, "CONSUMER_CONCURRENCY", 2)
+    running = peak = 0
+
+    async def slow(message):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    handler = client.message_handler("events", slow)
+    messages = [FakeIncomingMessage(json.dumps({"n": i}).encode()) for i in range(6)]
+    await asyncio.gather(*(handler(m) for m in messages))
+    assert peak == 2
+    assert all(m.acked for m in messages)
+
+    await handler(FakeIncomingMessage(b"not json"))
+    assert client.channel.published[-1][1] == "events.dlq"
+    assert client.consumer_counters["acked"] == 6
+    assert client.consumer_counters["dead_lettered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_server_named_queue_retries_only_to_itself(client, monkeypatch):
+    monkeypatch.setattr(settings, "CONSUMER_MAX_ATTEMPTS", 3)
+    routing_key = "todo.alice.updated"
+
+    async def fail(message):
+        raise RuntimeError("boom")
+
+    # TopicSubscription 的队列由 broker 命名，随连接删除
+    handler = client.message_handler("amq.gen-abc", fail, exchange="todo_events")
+    message = FakeIncomingMessage(b'{"user_id": "alice"}', routing_key=routing_key)
+    for _ in range(3):
+        await handler(message)
+        assert message.acked and not message.nacked
+        _, key, copy = client.channel.published[-1]
+        message = FakeIncomingMessage(copy.body, copy.headers, routing_key=key)
+
+    assert not any(name.startswith("amq.") for name in client.channel.queues)
+    # 副本经默认交换机进入本队列专属的延迟队列，到期后只回到该队列，
+    # 不会经 topic 交换机重复投递给其他订阅者
+    assert [(exchange, key) for exchange, key, _ in client.channel.published] == [
+        ("", "todo_events.retry.amq.gen-abc.1000ms"),
+        ("", "todo_events.retry.amq.gen-abc.2000ms"),
+        ("", "todo_events.dlq"),
+    ]
+    delay_queue = client.channel.queues["todo_events.retry.amq.gen-abc.1000ms"]
+    assert delay_queue["x-dead-letter-exchange"] == ""
+    assert delay_queue["x-dead-letter-routing-key"] == "amq.gen-abc"
+    assert client.channel.bindings == []
+    assert message.headers["x-original-queue"] == "amq.gen-abc"
+    assert client.consumer_counters["retried"] == 2
+    assert client.consumer_counters["dead_lettered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_requeue_does_not_escape_the_handler(client, monkeypatch):
+    async def fail(message):
+        raise RuntimeError("boom")
+
+    async def refuse(*args, **kwargs):
+        raise ConnectionError("channel closed")
+
+    monkeypatch.setattr(client.channel, "declare_queue", refuse)
+    message = FakeIncomingMessage(b'{"user_id": "alice"}')
+
+    async def closed_nack(requeue: bool = True) -> None:
+        raise ConnectionError("channel closed")
+
+    message.nack = closed_nack
+    await client.message_handler("events", fail)(message)
+    assert not message.acked
+    assert client.consumer_counters["requeued"] == 0
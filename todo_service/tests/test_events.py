@@ -0,0 +1,59 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.models import Priority
+from app.utils.events import (
+    CODECS,
+    batch_deleted_event,
+    batch_event,
+    deleted_event,
+    get_codec,
+    todo_event,
+)
+
+
+USER_ID = uuid.UUID("123e4567-e89b-12d3-a456-426614174000")
+
+
+def _todo(i: int):
+    return SimpleNamespace(
+        id=i,
+        content=f"买牛奶 {i}",
+        priority=list(Priority)[i % 3],
+        completed=i % 2 == 0,
+        list_id=7,
+        user_id=USER_ID,
+    )
+
+
+EVENTS = [
+    todo_event("created")(_todo(1)),
+    todo_event("updated")(_todo(2)),
+    deleted_event(USER_ID)(3),
+    batch_event("batch_created", USER_ID, 7)([_todo(i) for i in range(5)]),
+    batch_event("batch_updated", USER_ID)([_todo(i) for i in range(3)]),
+    batch_deleted_event(USER_ID)([4, 5, 6]),
+]
+
+
+@pytest.mark.parametrize("content_type", sorted(CODECS))
+@pytest.mark.parametrize("event", EVENTS, ids=lambda e: e["action"])
+def test_codecs_round_trip(content_type, event):
+    codec = get_codec(content_type)
+    assert codec.decode(codec.encode(event)) == event
+
+
+def test_compact_codecs_are_smaller_than_json():
+    event = EVENTS[0]
+    json_size = len(get_codec("application/json").encode(event))
+    assert len(get_codec("application/x-todo-event").encode(event)) < json_size / 2
+    if "application/msgpack" in CODECS:
+        assert len(get_codec("application/msgpack").encode(event)) < json_size
+
+
+def test_codec_is_chosen_by_content_type():
+    assert get_codec(None) is get_codec("application/json")
+    with pytest.raises(ValueError):
+        get_codec("text/plain")
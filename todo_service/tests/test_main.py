@@ -49,3 +49,41 @@ def test_protected_route(mock_user):
             "is_verified": True
         },
     }
+
+
+# 测试网关签名身份头
+def test_protected_route_with_identity_header(mock_user, monkeypatch):
+    import base64
+    import hashlib
+    import hmac
+    import json
+    import time
+
+    from app.core.config import settings
+    from app.core.dependencies import get_http_client
+    from app.core.redis_db import get_cache_redis
+
+    monkeypatch.setattr(settings, "IDENTITY_SECRET", "test-secret")
+    # 身份头校验不应访问 Redis 或用户服务
+    app.dependency_overrides = {
+        get_cache_redis: lambda: None,
+        get_http_client: lambda: None,
+    }
+
+    payload = mock_user.model_dump(mode="json") | {"exp": int(time.time()) + 60}
+    body = base64.urlsafe_b64encode(json.dumps(payload).encode()).rstrip(b"=")
+    signature = base64.urlsafe_b64encode(
+        hmac.new(b"test-secret", body, hashlib.sha256).digest()
+    ).rstrip(b"=")
+
+    response = client.get(
+        "/protected-route", headers={"x-identity": f"{body.decode()}.{signature.decode()}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["user"]["email"] == "test@example.com"
+
+    response = client.get(
+        "/protected-route", headers={"x-identity": f"{body.decode()}.forged"}
+    )
+    assert response.status_code == 401
+    app.dependency_overrides.clear()
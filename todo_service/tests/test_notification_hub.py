@@ -0,0 +1,234 @@
+import asyncio
+import json
+
+import pytest
+
+from app.utils.notification_hub import NotificationHub
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0, close_delay: float = 0):
+        self.delay = delay
+        self.close_delay = close_delay
+        self.sent: list[dict] = []
+        self.close_code: int | None = None
+        self.close_calls = 0
+
+    async def send_text(self, text: str) -> None:
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000) -> None:
+        self.close_calls += 1
+        await asyncio.sleep(self.close_delay)
+        self.close_code = code
+
+
+class FakeSubscription:
+    """代替 RabbitMQ 订阅，记录启动次数和绑定的用户，并把回调交给测试"""
+
+    def __init__(self):
+        self.started = 0
+        self.callback = None
+        self.user_ids: set[str] = set()
+
+    async def consume(self, callback) -> None:
+        self.started += 1
+        self.callback = callback
+        await asyncio.Future()
+
+    async def bind(self, user_id: str) -> None:
+        self.user_ids.add(user_id)
+
+    async def unbind(self, user_id: str) -> None:
+        self.user_ids.remove(user_id)
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_one_consumer_fans_out_by_user():
+    subscription = FakeSubscription()
+    hub = NotificationHub(subscription, queue_size=10)
+    alice_1, alice_2, bob = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await hub.register("alice", alice_1)
+    await hub.register("alice", alice_2)
+    bob_subscriber = await hub.register("bob", bob)
+    await _settle()
+    assert subscription.user_ids == {"alice", "bob"}
+
+    await subscription.callback({"user_id": "alice", "action": "created"})
+    await subscription.callback({"user_id": "bob", "action": "deleted"})
+    await subscription.callback({"user_id": "carol", "action": "deleted"})
+    await _settle()
+
+    assert subscription.started == 1
+    assert alice_1.sent == alice_2.sent == [{"user_id": "alice", "action": "created"}]
+    assert bob.sent == [{"user_id": "bob", "action": "deleted"}]
+
+    # 断开一个连接不影响共享消费者和其他连接
+    await hub.unregister(bob_subscriber)
+    assert subscription.user_ids == {"alice"}
+    await subscription.callback({"user_id": "alice", "action": "updated"})
+    await _settle()
+    assert len(alice_1.sent) == 2
+    stats = hub.stats()
+    assert stats["users"] == 1
+    assert stats["connections"] == 2
+    assert stats["unrouted"] == 1
+    assert stats["consumer_running"]
+    await hub.close()
+    assert not hub.stats()["consumer_running"]
+    assert subscription.user_ids == set()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_drops_oldest_messages():
+    hub = NotificationHub(FakeSubscription(), queue_size=2)
+    slow, fast = FakeWebSocket(delay=0.05), FakeWebSocket()
+    await hub.register("alice", slow)
+    await hub.register("alice", fast)
+    await _settle()
+
+    for i in range(5):
+        await hub.dispatch({"user_id": "alice", "seq": i})
+        await asyncio.sleep(0)
+    await _settle()
+    assert [m["seq"] for m in fast.sent] == [0, 1, 2, 3, 4]
+
+    await asyncio.sleep(0.2)
+    # 第 0 条已在发送中，队列只保留最新的两条
+    assert [m["seq"] for m in slow.sent] == [0, 3, 4]
+    assert hub.stats()["dropped"] == 2
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_is_disconnected():
+    hub = NotificationHub(FakeSubscription(), queue_size=1, drop_policy="disconnect")
+    slow = FakeWebSocket(delay=0.05)
+    await hub.register("alice", slow)
+    await _settle()
+
+    for i in range(3):
+        await hub.dispatch({"user_id": "alice", "seq": i})
+    await _settle()
+    assert slow.close_code == 1013
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_is_closed_only_once():
+    hub = NotificationHub(FakeSubscription(), queue_size=1, drop_policy="disconnect")
+    slow = FakeWebSocket(delay=1, close_delay=0.05)
+    await hub.register("alice", slow)
+    await _settle()
+
+    # 关闭握手期间持续有消息到达，不能反复取消并重新发起 close
+    for i in range(40):
+        await hub.dispatch({"user_id": "alice", "seq": i})
+        await asyncio.sleep(0.01)
+    assert slow.close_calls == 1
+    assert slow.close_code == 1013
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_batching_client_gets_coalesced_array_frames():
+    hub = NotificationHub(FakeSubscription(), queue_size=10)
+    batching, plain = FakeWebSocket(), FakeWebSocket()
+    await hub.register("alice", batching, window=0.02)
+    await hub.register("alice", plain)
+
+    events = [
+        {"user_id": "alice", "action": "created", "todo_id": 1, "completed": False},
+        {"user_id": "alice", "action": "updated", "todo_id": 1, "completed": True},
+        {"user_id": "alice", "action": "created", "todo_id": 2, "completed": False},
+        {"user_id": "alice", "action": "updated", "todo_id": 3, "completed": False},
+        {"user_id": "alice", "action": "updated", "todo_id": 3, "completed": True},
+        {"user_id": "alice", "action": "deleted", "todo_id": 2},
+        {"user_id": "alice", "action": "batch_deleted", "todo_ids": [7, 8]},
+    ]
+    for event in events:
+        await hub.dispatch(event)
+    await asyncio.sleep(0.1)
+
+    assert len(plain.sent) == len(events)
+    # 整个窗口只有一帧
+    assert batching.sent == [
+        [
+            {"user_id": "alice", "action": "created", "todo_id": 1, "completed": True},
+            {"user_id": "alice", "action": "updated", "todo_id": 3, "completed": True},
+            {"user_id": "alice", "action": "batch_deleted", "todo_ids": [7, 8]},
+        ]
+    ]
+    stats = hub.stats()
+    assert stats["coalesced"] == 3
+    assert stats["frames"] == len(events) + 1
+
+    # 下一个窗口重新计时
+    await hub.dispatch({"user_id": "alice", "action": "deleted", "todo_id": 1})
+    await asyncio.sleep(0.1)
+    assert batching.sent[-1] == [{"user_id": "alice", "action": "deleted", "todo_id": 1}]
+    await hub.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "events, expected",
+    [
+        (
+            [
+                {"user_id": "alice", "action": "created", "todo_id": 1},
+                {"user_id": "alice", "action": "batch_updated", "todos": [{"todo_id": 1}]},
+                {"user_id": "alice", "action": "updated", "todo_id": 1},
+            ],
+            ["created", "batch_updated", "updated"],
+        ),
+        (
+            [
+                {"user_id": "alice", "action": "created", "todo_id": 2},
+                {"user_id": "alice", "action": "batch_updated", "todos": [{"todo_id": 2}]},
+                {"user_id": "alice", "action": "deleted", "todo_id": 2},
+            ],
+            ["created", "batch_updated", "deleted"],
+        ),
+    ],
+    ids=["update_after_batch", "delete_after_batch"],
+)
+async def test_batch_events_are_coalescing_barriers(events, expected):
+    hub = NotificationHub(FakeSubscription(), queue_size=10)
+    batching = FakeWebSocket()
+    await hub.register("alice", batching, window=0.02)
+
+    for event in events:
+        await hub.dispatch(event)
+    await asyncio.sleep(0.1)
+
+    assert batching.sent == [events]
+    assert [event["action"] for event in batching.sent[0]] == expected
+    assert hub.stats()["coalesced"] == 0
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_event_does_not_block_unrelated_todos():
+    hub = NotificationHub(FakeSubscription(), queue_size=10)
+    batching = FakeWebSocket()
+    await hub.register("alice", batching, window=0.02)
+
+    for event in [
+        {"user_id": "alice", "action": "created", "todo_id": 1},
+        {"user_id": "alice", "action": "batch_deleted", "todo_ids": [5]},
+        {"user_id": "alice", "action": "deleted", "todo_id": 1},
+    ]:
+        await hub.dispatch(event)
+    await asyncio.sleep(0.1)
+
+    assert batching.sent == [
+        [{"user_id": "alice", "action": "batch_deleted", "todo_ids": [5]}]
+    ]
+    await hub.close()
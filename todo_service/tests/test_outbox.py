@@ -0,0 +1,144 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.exceptions import NotFoundException
+from app.models.models import Base, OutboxMessage, TodoList
+from app.repository.list_repo import TodoListRepository
+from app.repository.todo_repo import TodosRepository
+from app.schemas.schemas import TodoCreate, TodoUpdate
+from app.utils.events import todo_event
+from app.utils.outbox import OutboxRelay
+
+
+USER = SimpleNamespace(id=uuid.UUID("123e4567-e89b-12d3-a456-426614174000"))
+
+
+class FakePublisher:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.published: list[tuple[str, dict]] = []
+
+    async def send_messages(self, messages: list[dict], queue: str) -> None:
+        if self.fail:
+            raise ConnectionError("broker unavailable")
+        self.published.extend((queue, message) for message in messages)
+
+
+@pytest_asyncio.fixture
+async def session_factory(database_url):
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def list_id(session_factory):
+    async with session_factory() as session:
+        todo_list = TodoList(title="Inbox", user_id=USER.id)
+        session.add(todo_list)
+        await session.commit()
+        return todo_list.id
+
+
+async def _outbox(session) -> list[dict]:
+    result = await session.scalars(select(OutboxMessage).order_by(OutboxMessage.id))
+    return [message.payload for message in result]
+
+
+@pytest.mark.asyncio
+async def test_events_are_written_in_the_same_transaction(session_factory, list_id):
+    async with session_factory() as session:
+        todo = await TodoListRepository(session).create_todo(
+            list_id,
+            TodoCreate(content="a", priority="low"),
+            USER,
+            event=todo_event("created"),
+        )
+        await TodosRepository(session).update(
+            todo.id,
+            TodoUpdate(completed=True),
+            USER,
+            event=todo_event("updated"),
+        )
+        events = await _outbox(session)
+
+    assert [e["action"] for e in events] == ["created", "updated"]
+    assert events[0]["todo_id"] == todo.id
+    assert events[1]["completed"] is True
+
+
+@pytest.mark.asyncio
+async def test_no_event_when_the_change_is_rolled_back(session_factory, list_id):
+    async with session_factory() as session:
+        repository = TodosRepository(session)
+        with pytest.raises(NotFoundException):
+            await repository.delete(
+                12345, USER, event=lambda todo_id: {"todo_id": todo_id}
+            )
+        with pytest.raises(NotFoundException):
+            await repository.delete_many(
+                [12345], USER, event=lambda ids: {"todo_ids": ids}
+            )
+        assert await _outbox(session) == []
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_and_deletes_in_batches(session_factory, list_id):
+    async with session_factory() as session:
+        await TodoListRepository(session).create_todos(
+            list_id,
+            [TodoCreate(content=f"todo {i}", priority="low") for i in range(3)],
+            USER,
+            event=lambda todos: {"action": "batch_created", "count": len(todos)},
+        )
+        for i in range(4):
+            await TodoListRepository(session).create_todo(
+                list_id,
+                TodoCreate(content=f"single {i}", priority="low"),
+                USER,
+                todo_event("created"),
+            )
+
+    publisher = FakePublisher()
+    relay = OutboxRelay(session_factory, publisher, batch_size=3, poll_interval=1)
+    assert await relay.relay_once() == 3
+    assert await relay.relay_once() == 2
+    assert await relay.relay_once() == 0
+
+    assert publisher.published[0] == (
+        "todo_events",
+        {"action": "batch_created", "count": 3},
+    )
+    assert [m["content"] for _, m in publisher.published[1:]] == [
+        f"single {i}" for i in range(4)
+    ]
+    assert relay.stats()["published"] == 5
+    async with session_factory() as session:
+        assert await session.scalar(select(func.count(OutboxMessage.id))) == 0
+
+
+@pytest.mark.asyncio
+async def test_relay_keeps_messages_when_publishing_fails(session_factory, list_id):
+    async with session_factory() as session:
+        await TodoListRepository(session).create_todo(
+            list_id,
+            TodoCreate(content="a", priority="low"),
+            USER,
+            todo_event("created"),
+        )
+
+    relay = OutboxRelay(
+        session_factory, FakePublisher(fail=True), batch_size=10, poll_interval=1
+    )
+    with pytest.raises(ConnectionError):
+        await relay.relay_once()
+
+    relay.publisher = FakePublisher()
+    assert await relay.relay_once() == 1
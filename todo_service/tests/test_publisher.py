@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.utils.rabbitmq import PublishBuffer, RabbitMQClient
+
+
+class FakeBroker:
+    def __init__(self, delay: float = 0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.batches: list[list[tuple[str, str, bytes]]] = []
+
+    async def flush(self, batch: list[tuple[str, str, bytes]]) -> list:
+        self.batches.append(batch)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("broker unavailable")
+        # 每批最后一条未被确认
+        return [None] * (len(batch) - 1) + [RuntimeError("nack")]
+
+
+@pytest.mark.asyncio
+async def test_burst_is_published_in_bounded_batches():
+    broker = FakeBroker()
+    buffer = PublishBuffer(broker.flush, max_size=100, batch_size=4, flush_interval=0.05)
+
+    futures = [await buffer.put("", "q", str(i).encode()) for i in range(10)]
+    results = await asyncio.gather(*futures, return_exceptions=True)
+
+    assert [len(batch) for batch in broker.batches] == [4, 4, 2]
+    assert [body for batch in broker.batches for *_, body in batch] == [
+        str(i).encode() for i in range(10)
+    ]
+    failed = [i for i, r in enumerate(results) if isinstance(r, RuntimeError)]
+    assert failed == [3, 7, 9]
+    stats = buffer.stats()
+    assert stats["batches"] == 3
+    assert stats["messages"] == 10
+    assert stats["failed"] == 3
+    assert stats["last_batch_size"] == 2
+    await buffer.drain()
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_is_flushed_after_the_interval():
+    broker = FakeBroker()
+    buffer = PublishBuffer(broker.flush, max_size=100, batch_size=50, flush_interval=0.01)
+
+    first = await buffer.put("", "q", b"a")
+    second = await buffer.put("", "q", b"b")
+    await asyncio.wait_for(asyncio.gather(first, second, return_exceptions=True), 1)
+
+    assert broker.batches == [[("", "q", b"a"), ("", "q", b"b")]]
+    await buffer.drain()
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_applies_backpressure():
+    broker = FakeBroker(delay=0.05)
+    buffer = PublishBuffer(broker.flush, max_size=2, batch_size=1, flush_interval=0)
+
+    futures = [await buffer.put("", "q", b"0")]
+    await asyncio.sleep(0)  # 第一条已被取出，正在发布
+    futures += [await buffer.put("", "q", b"1"), await buffer.put("", "q", b"2")]
+    blocked = asyncio.create_task(buffer.put("", "q", b"3"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    assert buffer.stats()["buffered"] == 2
+
+    futures.append(await asyncio.wait_for(blocked, 1))
+    await asyncio.gather(*futures, return_exceptions=True)
+    assert broker.batches[-1] == [("", "q", b"3")]
+    await buffer.drain()
+
+
+@pytest.mark.asyncio
+async def test_flush_error_fails_the_whole_batch():
+    buffer = PublishBuffer(
+        FakeBroker(fail=True).flush, max_size=10, batch_size=10, flush_interval=0
+    )
+    future = await buffer.put("", "q", b"a")
+    with pytest.raises(ConnectionError):
+        await future
+    await buffer.drain()
+    assert buffer.stats()["failed"] == 1
+
+
+def test_todo_events_are_routed_by_user_and_action():
+    message = {"user_id": "alice", "action": "batch_deleted", "todo_ids": [1]}
+    assert RabbitMQClient._route(message, "todo_events") == (
+        "todo_events",
+        "todo.alice.batch_deleted",
+    )
+    # 其他目标按队列名经默认交换机投递
+    assert RabbitMQClient._route(message, "emails") == ("", "emails")
@@ -0,0 +1,61 @@
+import itertools
+import uuid
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.models import TodoList, Todos
+from app.repository.todo_repo import TODO_ORDERINGS, TodosRepository
+
+
+USER_ID = uuid.UUID("123e4567-e89b-12d3-a456-426614174000")
+
+
+async def _query_plan(session, statement: str, parameters) -> list[str]:
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    )
+    return [row[-1] for row in result]
+
+
+@pytest.mark.sqlite_only
+@pytest.mark.asyncio
+async def test_todo_queries_use_indexes(migrated_database_url):
+    """每种过滤与排序组合（含翻页）都应走索引，且不需要临时 B-tree 排序."""
+    engine = create_async_engine(migrated_database_url)
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        todo_list = TodoList(title="Inbox", user_id=USER_ID)
+        session.add(todo_list)
+        await session.flush()
+        session.add_all(
+            Todos(content=f"todo {i}", completed=i % 2 == 0, list_id=todo_list.id, user_id=USER_ID)
+            for i in range(4)
+        )
+        await session.commit()
+
+        repository = TodosRepository(session)
+        combinations = itertools.product(
+            [None, todo_list.id], [None, "finished", "unfinished"], TODO_ORDERINGS
+        )
+        for list_id, status, order_by in combinations:
+            filters = dict(user_id=USER_ID, list_id=list_id, status=status, order_by=order_by)
+            cursor = None
+            for _ in range(2):  # 第一页和带游标的下一页
+                statements.clear()
+                _, cursor = await repository.get_all(limit=1, cursor=cursor, **filters)
+                statement, parameters = statements[-1]
+                plan = await _query_plan(session, statement, parameters)
+                assert plan, filters
+                for step in plan:
+                    assert step.startswith("SEARCH todos USING INDEX"), (filters, plan)
+                    assert "TEMP B-TREE" not in step, (filters, plan)
+
+    await engine.dispose()
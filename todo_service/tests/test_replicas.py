@@ -0,0 +1,39 @@
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.replicas import PrimaryStickiness, ReadOnlySession
+from app.models.models import Base, TodoList
+
+
+USER_ID = uuid.UUID("123e4567-e89b-12d3-a456-426614174000")
+
+
+@pytest.mark.asyncio
+async def test_primary_stickiness_window():
+    stickiness = PrimaryStickiness(window=60)
+    assert not await stickiness.is_sticky(None, USER_ID)
+
+    stickiness.mark(USER_ID)
+    assert await stickiness.is_sticky(None, USER_ID)
+    assert not await stickiness.is_sticky(None, uuid.uuid4())
+
+    expired = PrimaryStickiness(window=0)
+    expired.mark(USER_ID)
+    assert not await expired.is_sticky(None, USER_ID)
+
+
+@pytest.mark.asyncio
+async def test_read_only_session_rejects_writes(database_url):
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(
+        engine, class_=AsyncSession, sync_session_class=ReadOnlySession
+    )
+    async with sessions() as session:
+        session.add(TodoList(title="Inbox", user_id=USER_ID))
+        with pytest.raises(RuntimeError):
+            await session.flush()
+    await engine.dispose()
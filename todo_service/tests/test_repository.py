@@ -0,0 +1,183 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.models.models import Base, Priority, TodoList, Todos
+from app.repository.list_repo import TodoListRepository
+from app.repository.todo_repo import TodosRepository
+from app.schemas.schemas import TodoCreate, TodoUpdate
+from app.utils.pagination import encode_cursor
+
+
+USER = SimpleNamespace(id=uuid.UUID("123e4567-e89b-12d3-a456-426614174000"))
+
+
+@pytest_asyncio.fixture
+async def session(database_url):
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def todos(session):
+    todo_list = TodoList(title="Inbox", user_id=USER.id)
+    session.add(todo_list)
+    await session.flush()
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    session.add_all(
+        Todos(
+            content=f"todo {i}",
+            priority=list(Priority)[i % 3],
+            # 部分记录创建时间相同，验证 (created_at, id) 的平局处理
+            created_at=start + timedelta(minutes=i // 2),
+            list_id=todo_list.id,
+            user_id=USER.id,
+        )
+        for i in range(25)
+    )
+    await session.commit()
+
+
+async def _collect(repository, **filters) -> list[int]:
+    ids, cursor = [], None
+    while True:
+        page, cursor = await repository.get_all(
+            user_id=USER.id, limit=7, cursor=cursor, **filters
+        )
+        assert len(page) <= 7
+        ids.extend(todo.id for todo in page)
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "order_by",
+    [None, "created_at asc", "created_at desc", "priority asc", "priority desc"],
+)
+async def test_todos_keyset_pagination_matches_full_ordering(session, todos, order_by):
+    repository = TodosRepository(session)
+    expected, _ = await repository.get_all(user_id=USER.id, order_by=order_by, limit=100)
+
+    ids = await _collect(repository, order_by=order_by)
+    assert ids == [todo.id for todo in expected]
+    assert len(ids) == 25
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "order_by, cursor",
+    [
+        # 按 created_at 分页得到的游标用于按 priority 排序
+        ("priority desc", encode_cursor(datetime(2026, 1, 1), 1)),
+        # 按 priority 分页得到的游标用于按 created_at 排序
+        ("created_at asc", encode_cursor(2, 1)),
+        ("created_at asc", encode_cursor("high", 1)),
+        ("priority asc", encode_cursor(["high"], 1)),
+        ("created_at asc", encode_cursor(datetime(2026, 1, 1), "1")),
+        ("priority asc", encode_cursor("high", True)),
+    ],
+    ids=["datetime", "int", "name", "list", "str_id", "bool_id"],
+)
+async def test_todos_rejects_mismatched_cursor(session, todos, order_by, cursor):
+    repository = TodosRepository(session)
+    with pytest.raises(BadRequestException):
+        await repository.get_all(user_id=USER.id, order_by=order_by, cursor=cursor)
+
+
+@pytest.mark.asyncio
+async def test_lists_rejects_invalid_cursor(session):
+    with pytest.raises(BadRequestException):
+        await TodoListRepository(session).get_all(USER, cursor=encode_cursor("1"))
+
+
+@pytest.mark.asyncio
+async def test_lists_keyset_pagination(session):
+    session.add_all(TodoList(title=f"List {i}", user_id=USER.id) for i in range(5))
+    await session.commit()
+    repository = TodoListRepository(session)
+
+    first, cursor = await repository.get_all(USER, limit=3)
+    second, last_cursor = await repository.get_all(USER, limit=3, cursor=cursor)
+    assert [row.TodoList.title for row in first + second] == [f"List {i}" for i in range(5)]
+    assert last_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_list_summary_counts_and_batched_todos(session, todos):
+    repository = TodoListRepository(session)
+    (row,), _ = await repository.get_all(USER)
+    assert row.todo_count == 25
+    assert row.completed_count == 0
+
+    todos_by_list = await repository.get_todos_for_lists(
+        [row.TodoList.id], USER, per_list_limit=10
+    )
+    assert [todo.content for todo in todos_by_list[row.TodoList.id]] == [
+        f"todo {i}" for i in range(10)
+    ]
+
+    await repository.delete(row.TodoList.id, USER)
+    assert (await repository.get_all(USER))[0] == []
+
+
+@pytest.mark.asyncio
+async def test_batch_create_update_delete(session):
+    todo_list = TodoList(title="Import", user_id=USER.id)
+    session.add(todo_list)
+    await session.commit()
+    lists = TodoListRepository(session)
+    repository = TodosRepository(session)
+
+    items = [TodoCreate(content=f"todo {i}", priority="high") for i in range(2500)]
+    created = await lists.create_todos(todo_list.id, items, USER)
+    assert [todo.content for todo in created] == [item.content for item in items]
+    assert all(todo.id and todo.created_at for todo in created)
+
+    ids = [todo.id for todo in created[:10]]
+    updated = await repository.update_many(ids, TodoUpdate(completed=True), USER)
+    assert sorted(todo.id for todo in updated) == ids
+    assert all(todo.completed for todo in updated)
+
+    # 任一 id 不存在时整批回滚
+    with pytest.raises(NotFoundException):
+        await repository.delete_many(ids + [10**9], USER)
+    await repository.delete_many(ids, USER)
+    (row,), _ = await lists.get_all(USER)
+    assert (row.todo_count, row.completed_count) == (2490, 0)
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_are_single_statements(session, todos):
+    repository = TodosRepository(session)
+    statements = []
+    event.listen(
+        session.bind.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement.split()[0]),
+    )
+
+    updated = await repository.update(1, TodoUpdate(content="renamed", completed=True), USER)
+    assert (updated.id, updated.content, updated.completed) == (1, "renamed", True)
+    assert statements == ["UPDATE"]
+
+    statements.clear()
+    await repository.delete(1, USER)
+    assert statements == ["DELETE"]
+
+    other_user = SimpleNamespace(id=uuid.uuid4())
+    with pytest.raises(NotFoundException):
+        await repository.update(2, TodoUpdate(completed=True), other_user)
+    with pytest.raises(NotFoundException):
+        await repository.delete(1, USER)
+    assert not (await repository.get_by_id(2, USER)).completed
@@ -0,0 +1,111 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.models import Base, Priority, TodoList, Todos
+from app.repository.todo_repo import TodosRepository
+
+
+USER = SimpleNamespace(id=uuid.UUID("123e4567-e89b-12d3-a456-426614174000"))
+
+
+async def _session(url):
+    engine = create_async_engine(url)
+    session = async_sessionmaker(engine, expire_on_commit=False)()
+    todo_list = TodoList(title="Inbox", user_id=USER.id)
+    session.add(todo_list)
+    await session.flush()
+    session.add_all(
+        Todos(content=content, priority=Priority.low, list_id=todo_list.id, user_id=USER.id)
+        for content in [
+            "buy milk",
+            "buy milk and bread",
+            "call the bank",
+            "write quarterly report",
+            "milk milk milk",
+            "report expenses",
+        ]
+    )
+    await session.commit()
+    return engine, session
+
+
+@pytest_asyncio.fixture
+async def fts_session(migrated_database_url):
+    engine, session = await _session(migrated_database_url)
+    yield session
+    await session.close()
+    await engine.dispose()
+
+
+@pytest.mark.sqlite_only
+@pytest.mark.asyncio
+async def test_search_uses_fts_with_prefix_ranking_and_snippets(fts_session):
+    repository = TodosRepository(fts_session)
+
+    todos, cursor = await repository.get_all(user_id=USER.id, search="mil")
+    assert cursor is None
+    assert todos[0].content == "milk milk milk"
+    assert {todo.content for todo in todos} == {
+        "buy milk",
+        "buy milk and bread",
+        "milk milk milk",
+    }
+    assert "<mark>milk</mark>" in todos[1].snippet
+
+    todos, _ = await repository.get_all(user_id=USER.id, search="rep* quart")
+    assert [todo.content for todo in todos] == ["write quarterly report"]
+
+
+@pytest.mark.sqlite_only
+@pytest.mark.asyncio
+async def test_search_relevance_pagination(fts_session):
+    repository = TodosRepository(fts_session)
+    expected, _ = await repository.get_all(user_id=USER.id, search="milk")
+
+    first, cursor = await repository.get_all(user_id=USER.id, search="milk", limit=2)
+    second, cursor = await repository.get_all(
+        user_id=USER.id, search="milk", limit=2, cursor=cursor
+    )
+    assert cursor is None
+    assert [t.id for t in first + second] == [t.id for t in expected]
+
+
+@pytest.mark.sqlite_only
+@pytest.mark.asyncio
+async def test_fts_index_follows_updates_and_deletes(fts_session):
+    repository = TodosRepository(fts_session)
+    (todo,), _ = await repository.get_all(user_id=USER.id, search="bank")
+
+    todo.content = "call the dentist"
+    await fts_session.commit()
+    assert (await repository.get_all(user_id=USER.id, search="bank"))[0] == []
+    assert (await repository.get_all(user_id=USER.id, search="dentist"))[0] == [todo]
+
+    await repository.delete(todo.id, USER)
+    assert (await repository.get_all(user_id=USER.id, search="dentist"))[0] == []
+    # 索引与 todos 不一致时 integrity-check 会报错
+    await fts_session.execute(
+        text("INSERT INTO todos_fts(todos_fts) VALUES ('integrity-check')")
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_falls_back_to_ilike_without_fts(database_url):
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+    engine, session = await _session(database_url)
+    try:
+        # 子串匹配只有 ILIKE 能做到，FTS 会要求 "ilk"、"a" 为词前缀
+        todos, _ = await TodosRepository(session).get_all(user_id=USER.id, search="ilk a")
+        assert [todo.content for todo in todos] == ["buy milk and bread"]
+        assert getattr(todos[0], "snippet", None) is None
+    finally:
+        await session.close()
+        await engine.dispose()
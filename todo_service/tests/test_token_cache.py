@@ -0,0 +1,113 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.token_cache import TokenCache
+from app.schemas.schemas import UserRead
+
+
+USER = UserRead(
+    id=uuid.UUID("123e4567-e89b-12d3-a456-426614174000"),
+    email="alice@example.com",
+    is_active=True,
+    is_superuser=False,
+    is_verified=True,
+)
+
+
+class Loader:
+    """可控的用户查询：调用 release 前一直挂起"""
+
+    def __init__(self, result: UserRead | Exception = USER):
+        self.result = result
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.released = asyncio.Event()
+
+    async def __call__(self) -> UserRead:
+        self.calls += 1
+        self.started.set()
+        await self.released.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+    def release(self) -> None:
+        self.released.set()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_load():
+    cache = TokenCache(max_entries=10, ttl=60, negative_ttl=5)
+    loader = Loader()
+    requests = [asyncio.create_task(cache.get_or_load("t", loader)) for _ in range(5)]
+    await loader.started.wait()
+    loader.release()
+
+    assert await asyncio.gather(*requests) == [USER] * 5
+    assert await cache.get_or_load("t", loader) == USER
+    assert loader.calls == 1
+    assert cache.stats() == {
+        "hits": 1,
+        "negative_hits": 0,
+        "misses": 1,
+        "redis_hits": 0,
+        "coalesced": 4,
+        "size": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_waiters():
+    cache = TokenCache(max_entries=10, ttl=60, negative_ttl=5)
+    loader = Loader()
+    leader = asyncio.create_task(cache.get_or_load("t", loader))
+    await loader.started.wait()
+    waiter = asyncio.create_task(cache.get_or_load("t", loader))
+    await asyncio.sleep(0)
+
+    # 例如客户端断开连接
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    loader.release()
+
+    assert await waiter == USER
+    assert loader.calls == 1
+    assert await cache.get_or_load("t", loader) == USER
+
+
+@pytest.mark.asyncio
+async def test_auth_failures_are_cached_for_the_negative_ttl(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("app.core.token_cache.time.monotonic", lambda: now)
+    cache = TokenCache(max_entries=10, ttl=60, negative_ttl=5)
+    loader = Loader(HTTPException(status_code=401, detail="Invalid token"))
+    loader.release()
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            await cache.get_or_load("bad", loader)
+        assert exc_info.value.status_code == 401
+    assert loader.calls == 1
+    assert cache.counters["negative_hits"] == 1
+
+    now += 6
+    loader.result = USER
+    assert await cache.get_or_load("bad", loader) == USER
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_not_cached():
+    cache = TokenCache(max_entries=10, ttl=60, negative_ttl=5)
+    loader = Loader(HTTPException(status_code=503, detail="User service unavailable"))
+    loader.release()
+
+    with pytest.raises(HTTPException):
+        await cache.get_or_load("t", loader)
+    loader.result = USER
+    assert await cache.get_or_load("t", loader) == USER
+    assert loader.calls == 2
@@ -1,15 +1,21 @@
-import os
 from collections.abc import AsyncGenerator
 
 from fastapi import Depends
 from fastapi_users.db import SQLAlchemyBaseUserTableUUID, SQLAlchemyUserDatabase
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
 
+from app.core.config import config
 
-# 从环境变量获取数据库路径，默认为 data/db.sqlite3
-database_path = os.getenv("SQLITE_DB_PATH", "data/users.sqlite3")
-DATABASE_URL = f"sqlite+aiosqlite:///{database_path}"
+
+# DATABASE_URL 未设置时使用环境变量 SQLITE_DB_PATH 指定的 SQLite 数据库
+DATABASE_URL = config.database_url
 
 
 class Base(DeclarativeBase):
@@ -20,7 +26,52 @@ class User(SQLAlchemyBaseUserTableUUID, Base):
     pass
 
 
-engine = create_async_engine(DATABASE_URL)
+def _sqlite_pragmas() -> dict:
+    return {
+        "journal_mode": config.SQLITE_JOURNAL_MODE,
+        "synchronous": config.SQLITE_SYNCHRONOUS,
+        "cache_size": config.SQLITE_CACHE_SIZE,
+        "mmap_size": config.SQLITE_MMAP_SIZE,
+        "temp_store": config.SQLITE_TEMP_STORE,
+        "busy_timeout": config.SQLITE_BUSY_TIMEOUT,
+    }
+
+
+def create_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    """创建服务使用的异步引擎：SQLite 连接建立时设置 pragma，PostgreSQL 缓存预编译语句，SQL 日志只在 DEBUG_MODE 时输出"""
+    options = {"echo": config.DEBUG_MODE}
+    # 内存数据库使用 StaticPool，不接受连接池参数
+    if ":memory:" not in url:
+        options.update(
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+        )
+    if make_url(url).get_backend_name() == "postgresql":
+        options.update(
+            pool_recycle=config.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            connect_args={
+                "prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+                "statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+            },
+        )
+    engine = create_async_engine(url, **options)
+
+    if engine.dialect.name == "sqlite":
+        pragmas = _sqlite_pragmas()
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+
+    return engine
+
+
+engine = create_engine()
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
 